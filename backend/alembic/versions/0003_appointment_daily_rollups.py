@@ -0,0 +1,51 @@
+"""appointment daily rollups
+
+Revision ID: 0003_appointment_daily_rollups
+Revises: 0002_fastapi_parity
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_appointment_daily_rollups"
+down_revision = "0002_fastapi_parity"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "appointment_daily_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("shop_id", sa.Integer(), sa.ForeignKey("shops.id"), nullable=True),
+        sa.Column("professional_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("cuts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("confirmed_revenue", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("gross_commission", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("pending_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("professional_id", "day", name="uq_appointment_daily_rollups_professional_day"),
+    )
+    op.create_index("ix_appointment_daily_rollups_shop_id", "appointment_daily_rollups", ["shop_id"], unique=False)
+    op.create_index("ix_appointment_daily_rollups_day", "appointment_daily_rollups", ["day"], unique=False)
+
+    # Backfill a partir do histórico existente
+    op.execute(
+        """
+        INSERT INTO appointment_daily_rollups (shop_id, professional_id, day, cuts, confirmed_revenue, gross_commission, pending_count)
+        SELECT p.shop_id, a.professional_id, CAST(a.date AS DATE), COUNT(a.id),
+               COALESCE(SUM(CASE WHEN a.status = 'confirmed' THEN a.price ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN a.status = 'confirmed' THEN (a.price * a.commission_rate) / 100 ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN a.status = 'pending' THEN 1 ELSE 0 END), 0)
+        FROM appointments a
+        LEFT JOIN profiles p ON p.user_id = a.professional_id
+        GROUP BY p.shop_id, a.professional_id, CAST(a.date AS DATE)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointment_daily_rollups_day", table_name="appointment_daily_rollups")
+    op.drop_index("ix_appointment_daily_rollups_shop_id", table_name="appointment_daily_rollups")
+    op.drop_table("appointment_daily_rollups")
@@ -0,0 +1,25 @@
+"""rollup shop/day index for windowed stats
+
+Revision ID: 0004_rollup_shop_day_index
+Revises: 0003_appointment_daily_rollups
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0004_rollup_shop_day_index"
+down_revision = "0003_appointment_daily_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_appointment_daily_rollups_shop_id_day", "appointment_daily_rollups", ["shop_id", "day"], unique=False)
+    op.drop_index("ix_appointment_daily_rollups_day", table_name="appointment_daily_rollups")
+    op.drop_index("ix_appointment_daily_rollups_shop_id", table_name="appointment_daily_rollups")
+
+
+def downgrade() -> None:
+    op.create_index("ix_appointment_daily_rollups_shop_id", "appointment_daily_rollups", ["shop_id"], unique=False)
+    op.create_index("ix_appointment_daily_rollups_day", "appointment_daily_rollups", ["day"], unique=False)
+    op.drop_index("ix_appointment_daily_rollups_shop_id_day", table_name="appointment_daily_rollups")
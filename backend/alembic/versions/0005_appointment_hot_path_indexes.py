@@ -0,0 +1,35 @@
+"""appointment hot path indexes
+
+Revision ID: 0005_appointment_hot_path_indexes
+Revises: 0004_rollup_shop_day_index
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_appointment_hot_path_indexes"
+down_revision = "0004_rollup_shop_day_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_appointments_professional_id_date", "appointments", ["professional_id", sa.text("date DESC")], unique=False)
+    op.create_index("ix_appointments_date_id", "appointments", [sa.text("date DESC"), sa.text("id DESC")], unique=False)
+    op.create_index("ix_appointments_status_date", "appointments", ["status", "date"], unique=False)
+    op.create_index(
+        "ix_appointments_pending_date",
+        "appointments",
+        ["date"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointments_pending_date", table_name="appointments")
+    op.drop_index("ix_appointments_status_date", table_name="appointments")
+    op.drop_index("ix_appointments_date_id", table_name="appointments")
+    op.drop_index("ix_appointments_professional_id_date", table_name="appointments")
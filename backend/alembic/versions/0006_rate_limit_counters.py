@@ -0,0 +1,28 @@
+"""shared rate limit counters
+
+Revision ID: 0006_rate_limit_counters
+Revises: 0005_appointment_hot_path_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_rate_limit_counters"
+down_revision = "0005_appointment_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limit_counters",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("window", sa.BigInteger(), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("key", "window"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rate_limit_counters")
@@ -0,0 +1,45 @@
+"""media upload background jobs
+
+Revision ID: 0007_media_upload_jobs
+Revises: 0006_rate_limit_counters
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_media_upload_jobs"
+down_revision = "0006_rate_limit_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("media_uploads") as batch:
+        batch.add_column(sa.Column("status", sa.String(length=16), nullable=False, server_default="done"))
+        batch.add_column(sa.Column("local_path", sa.Text(), nullable=True))
+        batch.add_column(sa.Column("content_type", sa.String(), nullable=True))
+        batch.add_column(sa.Column("error", sa.Text(), nullable=True))
+        batch.alter_column("secure_url", existing_type=sa.Text(), nullable=True)
+        batch.alter_column("public_id", existing_type=sa.Text(), nullable=True)
+        batch.alter_column("asset_id", existing_type=sa.Text(), nullable=True)
+    op.create_index(
+        "ix_media_uploads_pending",
+        "media_uploads",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_media_uploads_pending", table_name="media_uploads")
+    op.execute("DELETE FROM media_uploads WHERE secure_url IS NULL")
+    with op.batch_alter_table("media_uploads") as batch:
+        batch.alter_column("asset_id", existing_type=sa.Text(), nullable=False)
+        batch.alter_column("public_id", existing_type=sa.Text(), nullable=False)
+        batch.alter_column("secure_url", existing_type=sa.Text(), nullable=False)
+        batch.drop_column("error")
+        batch.drop_column("content_type")
+        batch.drop_column("local_path")
+        batch.drop_column("status")
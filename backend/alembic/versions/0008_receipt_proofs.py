@@ -0,0 +1,39 @@
+"""content-addressed receipt proofs
+
+Revision ID: 0008_receipt_proofs
+Revises: 0007_media_upload_jobs
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_receipt_proofs"
+down_revision = "0007_media_upload_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "receipt_proofs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("perceptual_hash", sa.String(length=16), nullable=True),
+        sa.Column("media_id", sa.Integer(), sa.ForeignKey("media_uploads.id"), nullable=False),
+        sa.Column("local_url", sa.String(), nullable=False),
+        sa.Column("secure_url", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.UniqueConstraint("sha256", name="uq_receipt_proofs_sha256"),
+        sa.UniqueConstraint("local_url", name="uq_receipt_proofs_local_url"),
+    )
+    op.create_index("ix_receipt_proofs_perceptual_hash", "receipt_proofs", ["perceptual_hash"], unique=False)
+    op.create_index("ix_receipt_proofs_secure_url", "receipt_proofs", ["secure_url"], unique=False)
+    op.create_index("ix_appointments_proof_hash", "appointments", ["proof_hash"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointments_proof_hash", table_name="appointments")
+    op.drop_index("ix_receipt_proofs_secure_url", table_name="receipt_proofs")
+    op.drop_index("ix_receipt_proofs_perceptual_hash", table_name="receipt_proofs")
+    op.drop_table("receipt_proofs")
@@ -0,0 +1,33 @@
+"""appointment time buckets for near-duplicate detection
+
+Revision ID: 0009_appointment_duplicate_buckets
+Revises: 0008_receipt_proofs
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_appointment_duplicate_buckets"
+down_revision = "0008_receipt_proofs"
+branch_labels = None
+depends_on = None
+
+# Deve acompanhar app.models.appointment.DUPLICATE_BUCKET_SECONDS.
+BUCKET_SECONDS = 600
+
+
+def upgrade() -> None:
+    op.add_column("appointments", sa.Column("time_bucket", sa.BigInteger(), nullable=True))
+    op.execute(f"UPDATE appointments SET time_bucket = CAST(FLOOR(EXTRACT(EPOCH FROM date) / {BUCKET_SECONDS}) AS BIGINT)")
+    op.create_index(
+        "ix_appointments_duplicate_bucket",
+        "appointments",
+        ["professional_id", "time_bucket", "price", "payment_method"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_appointments_duplicate_bucket", table_name="appointments")
+    op.drop_column("appointments", "time_bucket")
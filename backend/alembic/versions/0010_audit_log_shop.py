@@ -0,0 +1,36 @@
+"""audit log shop scope and keyset index
+
+Revision ID: 0010_audit_log_shop
+Revises: 0009_appointment_duplicate_buckets
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_audit_log_shop"
+down_revision = "0009_appointment_duplicate_buckets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("audit_logs", sa.Column("shop_id", sa.Integer(), sa.ForeignKey("shops.id"), nullable=True))
+    op.execute(
+        """
+        UPDATE audit_logs SET shop_id = p.shop_id
+        FROM profiles p
+        WHERE p.user_id = audit_logs.actor_id
+        """
+    )
+    op.create_index(
+        "ix_audit_logs_shop_id_created_at",
+        "audit_logs",
+        ["shop_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_logs_shop_id_created_at", table_name="audit_logs")
+    op.drop_column("audit_logs", "shop_id")
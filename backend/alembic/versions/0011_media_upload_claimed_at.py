@@ -0,0 +1,22 @@
+"""media upload claim time for stale-job recovery
+
+Revision ID: 0011_media_upload_claimed_at
+Revises: 0010_audit_log_shop
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_media_upload_claimed_at"
+down_revision = "0010_audit_log_shop"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("media_uploads", sa.Column("claimed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("media_uploads", "claimed_at")
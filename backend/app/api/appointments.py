@@ -1,16 +1,42 @@
+import base64
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user, get_current_profile
+from app.api.deps import get_async_db, get_current_profile, get_current_profile_async, get_current_user, get_current_user_async, get_db
 from app.models.appointment import Appointment
+from app.models.profile import Profile
 from app.models.service import Service
-from app.schemas.appointment import AppointmentBase, AppointmentCreate, AppointmentStatusUpdate
+from app.schemas.appointment import (
+    AppointmentBase,
+    AppointmentBatchResult,
+    AppointmentBulkReview,
+    AppointmentBulkReviewResult,
+    AppointmentCreate,
+    AppointmentStatusUpdate,
+)
 from app.models.user import User
+from app.core.audit import audit_writer
 from app.core.uuid_utils import normalize_uuid_str
+from app.db.appointment_import import import_appointments
+from app.db.duplicates import find_near_duplicate
+from app.db.receipt_proofs import find_receipt_proof, proof_already_used
+from app.db.rollups import record_appointment_created, record_status_change, record_status_changes
 
 router = APIRouter(prefix="/api/appointments", tags=["appointments"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BATCH_ROWS = 5000
+MAX_REVIEW_ITEMS = 2000
+STREAM_BATCH_SIZE = 500
+
 
 def serialize_appointment(appointment: Appointment) -> AppointmentBase:
     return AppointmentBase(
@@ -29,32 +55,78 @@ def serialize_appointment(appointment: Appointment) -> AppointmentBase:
     )
 
 
+def encode_keyset(moment: datetime, row_id: int) -> str:
+    raw = json.dumps([moment.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_cursor(appointment: Appointment) -> str:
+    return encode_keyset(appointment.date, appointment.id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_value, appointment_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(date_value), int(appointment_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="cursor inválido") from exc
+
+
+async def stream_appointments(bind, statement) -> AsyncIterator[bytes]:
+    # O Session da dependência é fechado antes do corpo ser enviado; o stream usa um próprio.
+    async with AsyncSession(bind=bind) as session:
+        async for appointment in await session.stream_scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE)):
+            yield serialize_appointment(appointment).model_dump_json().encode() + b"\n"
+
+
 @router.get("", response_model=list[AppointmentBase])
-def list_appointments(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-    profile=Depends(get_current_profile),
+async def list_appointments(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+    profile=Depends(get_current_profile_async),
     start_date: str | None = Query(None, alias="startDate"),
     end_date: str | None = Query(None, alias="endDate"),
     professional_id: str | None = Query(None, alias="professionalId"),
+    status: Literal["pending", "confirmed", "rejected"] | None = Query(None),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    output_format: Literal["json", "ndjson"] = Query("json", alias="format"),
 ):
     if not profile:
         raise HTTPException(status_code=403, detail="Perfil não encontrado.")
     if profile.role == "professional" and profile.approval_status != "active":
         raise HTTPException(status_code=403, detail="Aguardando aprovação para acessar o painel.")
 
-    query = db.query(Appointment)
+    statement = select(Appointment)
     if profile.role == "professional":
-        query = query.filter(Appointment.professional_id == user.id)
+        statement = statement.where(Appointment.professional_id == user.id)
     elif professional_id:
         professional_id = normalize_uuid_str(professional_id, field_name="professionalId")
-        query = query.filter(Appointment.professional_id == professional_id)
+        statement = statement.where(Appointment.professional_id == professional_id)
 
+    if status:
+        statement = statement.where(Appointment.status == status)
     if start_date:
-        query = query.filter(Appointment.date >= datetime.fromisoformat(start_date))
+        statement = statement.where(Appointment.date >= datetime.fromisoformat(start_date))
     if end_date:
-        query = query.filter(Appointment.date <= datetime.fromisoformat(end_date))
-    appointments = query.order_by(Appointment.date.desc()).all()
+        statement = statement.where(Appointment.date <= datetime.fromisoformat(end_date))
+    if cursor:
+        statement = statement.where(tuple_(Appointment.date, Appointment.id) < decode_cursor(cursor))
+    statement = statement.order_by(Appointment.date.desc(), Appointment.id.desc())
+
+    if output_format == "ndjson":
+        # Só o stream devolve a listagem inteira; em JSON a página tem tamanho padrão.
+        if limit:
+            statement = statement.limit(limit)
+        return StreamingResponse(stream_appointments(db.bind, statement), media_type="application/x-ndjson")
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    appointments = (await db.scalars(statement.limit(limit + 1))).all()
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(appointments[-1])
     return [serialize_appointment(appointment) for appointment in appointments]
 
 
@@ -68,7 +140,8 @@ def create_appointment(
     if not profile or profile.role != "professional" or profile.approval_status != "active":
         raise HTTPException(status_code=403, detail="Você não pode registrar atendimentos no momento.")
 
-    service = db.query(Service).filter(Service.id == payload.serviceId).first()
+    # Comissão lida do banco: o catálogo em cache pode estar defasado (TTL, outros workers).
+    service = db.get(Service, payload.serviceId)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
 
@@ -80,30 +153,56 @@ def create_appointment(
         if duplicate:
             raise HTTPException(status_code=409, detail="Transação já registrada")
 
+    # Comprovante conhecido: grava o hash e sinaliza reuso do mesmo arquivo (ou de uma imagem idêntica) pelo índice.
+    proof = find_receipt_proof(db, payload.proofUrl) if payload.proofUrl else None
+    proof_reused = proof is not None and proof_already_used(db, proof)
+    # Mesma venda lançada de novo: mesmo profissional, valor e forma de pagamento, cliente parecido, poucos minutos.
+    now = datetime.utcnow()
+    near_duplicate = find_near_duplicate(db, user.id, now, payload.price, payload.paymentMethod, payload.customerName)
+
     appointment = Appointment(
         professional_id=user.id,
         service_id=payload.serviceId,
+        date=now,
         customer_name=payload.customerName,
         price=payload.price,
         commission_rate=service.commission_rate,
         payment_method=payload.paymentMethod,
         transaction_id=payload.transactionId,
         proof_url=payload.proofUrl,
-        proof_hash=payload.proofHash,
+        proof_hash=proof.sha256 if proof else None,
         status="pending",
-        possible_duplicate=False,
+        possible_duplicate=proof_reused or near_duplicate is not None,
     )
     db.add(appointment)
+    db.flush()
+    record_appointment_created(db, appointment, shop_id=profile.shop_id)
     db.commit()
     db.refresh(appointment)
     return serialize_appointment(appointment)
 
 
+@router.post("/batch", response_model=AppointmentBatchResult)
+def create_appointments_batch(
+    rows: list[dict] = Body(...),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    profile=Depends(get_current_profile),
+):
+    if not profile or profile.role != "professional" or profile.approval_status != "active":
+        raise HTTPException(status_code=403, detail="Você não pode registrar atendimentos no momento.")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"Envie no máximo {MAX_BATCH_ROWS} atendimentos por lote")
+    # Linhas inválidas voltam em errors; as demais são gravadas.
+    return import_appointments(db, user.id, profile.shop_id, rows)
+
+
 @router.patch("/{appointment_id}/status", response_model=AppointmentBase)
 def update_status(
     appointment_id: int,
     payload: AppointmentStatusUpdate,
     db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
     profile=Depends(get_current_profile),
 ):
     if not profile or profile.role != "manager":
@@ -111,7 +210,85 @@ def update_status(
     appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    appointment.status = payload.status
+    previous_status = appointment.status
+    # UPDATE condicionado ao status lido: com dois gerentes (ou um duplo clique) só quem fez a transição aplica o delta.
+    changed = db.execute(
+        update(Appointment)
+        .where(Appointment.id == appointment.id, Appointment.status == previous_status)
+        .values(status=payload.status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if changed != 1:
+        db.rollback()
+        db.refresh(appointment)
+        if appointment.status == payload.status:
+            return serialize_appointment(appointment)
+        raise HTTPException(status_code=409, detail="Status alterado por outra requisição; recarregue e tente novamente")
+    record_status_change(db, appointment, previous_status, payload.status)
     db.commit()
+    audit_writer.record(
+        user.id,
+        "appointment.status",
+        shop_id=profile.shop_id,
+        appointment_id=appointment.id,
+        metadata={"from": previous_status, "to": payload.status, "reason": payload.reason},
+    )
     db.refresh(appointment)
     return serialize_appointment(appointment)
+
+
+@router.post("/review", response_model=AppointmentBulkReviewResult)
+def review_appointments(
+    payload: AppointmentBulkReview,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    profile=Depends(get_current_profile),
+):
+    if not profile or profile.role != "manager":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if len(payload.items) > MAX_REVIEW_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Envie no máximo {MAX_REVIEW_ITEMS} atendimentos por revisão")
+
+    # Último item vence se o mesmo id vier repetido.
+    targets = {item.id: item for item in payload.items}
+    current = db.scalars(
+        select(Appointment)
+        .join(Profile, Profile.user_id == Appointment.professional_id)
+        .where(Appointment.id.in_(targets), Profile.shop_id == profile.shop_id)
+    ).all()
+    found_ids = [appointment.id for appointment in current]
+    not_found = sorted(targets.keys() - set(found_ids))
+
+    by_transition: dict[tuple[str, str], list[Appointment]] = {}
+    for appointment in current:
+        item = targets[appointment.id]
+        if appointment.status != item.status:
+            by_transition.setdefault((appointment.status, item.status), []).append(appointment)
+
+    # Um UPDATE por transição (status lido -> novo), condicionado ao status lido: linhas que outra requisição mudou
+    # nesse meio-tempo ficam de fora, e rollups e audit log só contam o que este UPDATE mudou (RETURNING).
+    changes: list[tuple[Appointment, str]] = []
+    for (previous_status, status), appointments in by_transition.items():
+        changed_ids = set(
+            db.scalars(
+                update(Appointment)
+                .where(Appointment.id.in_([appointment.id for appointment in appointments]), Appointment.status == previous_status)
+                .values(status=status)
+                .returning(Appointment.id)
+                .execution_options(synchronize_session=False)
+            )
+        )
+        changes += [(appointment, status) for appointment in appointments if appointment.id in changed_ids]
+    audit = [
+        (appointment.id, {"from": appointment.status, "to": status, "reason": targets[appointment.id].reason})
+        for appointment, status in changes
+    ]
+
+    # Um upsert de rollups; o audit log vai em lote pelo audit_writer.
+    record_status_changes(db, changes, profile.shop_id)
+    db.commit()
+    for appointment_id, metadata in audit:
+        audit_writer.record(user.id, "appointment.status", shop_id=profile.shop_id, appointment_id=appointment_id, metadata=metadata)
+
+    updated = db.scalars(select(Appointment).where(Appointment.id.in_(found_ids)).order_by(Appointment.id)).all() if found_ids else []
+    return AppointmentBulkReviewResult(appointments=[serialize_appointment(appointment) for appointment in updated], notFound=not_found)
@@ -0,0 +1,51 @@
+import json
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.api.appointments import decode_cursor, encode_keyset
+from app.api.deps import get_db, require_manager
+from app.models.audit_log import AuditLog
+from app.models.profile import Profile
+from app.schemas.audit import AuditEntry
+
+router = APIRouter(prefix="/api/audit", tags=["audit"])
+
+MAX_PAGE_SIZE = 500
+
+
+@router.get("", response_model=list[AuditEntry])
+def list_audit_entries(
+    response: Response,
+    db: Session = Depends(get_db),
+    manager_profile: Profile = Depends(require_manager),
+    action: str | None = Query(None),
+    appointment_id: int | None = Query(None, alias="appointmentId"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+):
+    # Keyset por (created_at, id) sobre ix_audit_logs_shop_id_created_at; sem OFFSET.
+    statement = select(AuditLog).where(AuditLog.shop_id == manager_profile.shop_id)
+    if action:
+        statement = statement.where(AuditLog.action == action)
+    if appointment_id is not None:
+        statement = statement.where(AuditLog.appointment_id == appointment_id)
+    if cursor:
+        statement = statement.where(tuple_(AuditLog.created_at, AuditLog.id) < decode_cursor(cursor))
+    statement = statement.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+
+    entries = db.scalars(statement).all()
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response.headers["X-Next-Cursor"] = encode_keyset(entries[-1].created_at, entries[-1].id)
+    return [
+        AuditEntry(
+            id=entry.id,
+            actorId=entry.actor_id,
+            action=entry.action,
+            appointmentId=entry.appointment_id,
+            metadata=json.loads(entry.metadata_json) if entry.metadata_json else None,
+            createdAt=entry.created_at,
+        )
+        for entry in entries
+    ]
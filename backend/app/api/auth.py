@@ -1,24 +1,30 @@
+import logging
 import re
 import secrets
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Response, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, Request
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_user, get_current_profile, require_manager
-from app.core.security import create_access_token, verify_password, get_password_hash
+from app.core.audit import audit_writer
+from app.core.security import create_access_token, password_needs_rehash
+from app.core.password_hashing import password_hasher
 from app.core.config import settings
+from app.core.identity_cache import identity_cache
 from app.core.rate_limiter import RateLimiter
 from app.core.uuid_utils import normalize_uuid_str
 from app.models.user import User
 from app.models.shop import Shop
 from app.models.profile import Profile
-from app.models.professional_approval import ProfessionalApproval
 from app.schemas.auth import LoginRequest, RegisterRequest, ProfessionalDecisionRequest
 from app.schemas.user import UserBase
 from app.schemas.shop import ShopBase
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["auth"])
-rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
+rate_limiter = RateLimiter(max_requests=settings.auth_rate_limit_per_minute, window_seconds=60)
 
 
 def ensure_luxe_email(email_or_prefix: str) -> str:
@@ -42,12 +48,34 @@ def generate_unique_shop_code(db: Session) -> str:
     raise HTTPException(status_code=500, detail={"message": "Falha ao gerar código único da loja."})
 
 
+def rehash_password(bind, user_id: str, password: str, previous_hash: str) -> None:
+    """Re-hash with the current cost after the response is sent; skipped if the password changed meanwhile."""
+    try:
+        new_hash = password_hasher.hash(password)
+    except HTTPException:
+        logger.info("Password rehash for %s skipped: hashing pool busy", user_id)
+        return
+    with Session(bind=bind) as db:
+        db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == previous_hash)
+            .values(hashed_password=new_hash)
+        )
+        db.commit()
+
+
 @router.post("/api/auth/login", response_model=UserBase)
-def login(payload: LoginRequest, response: Response, request: Request, db: Session = Depends(get_db)):
+def login(
+    payload: LoginRequest,
+    response: Response,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     rate_limiter.hit(f"login:{request.client.host}")
     normalized_email = payload.email.strip().lower()
     user = db.query(User).filter(User.email == normalized_email).first()
-    if not user or not user.hashed_password or not verify_password(payload.password, user.hashed_password):
+    if not user or not user.hashed_password or not password_hasher.verify(payload.password, user.hashed_password):
         raise HTTPException(status_code=401, detail={"message": "Credenciais inválidas. Verifique e tente novamente."})
 
     profile = db.query(Profile).filter(Profile.user_id == user.id).first()
@@ -57,6 +85,9 @@ def login(payload: LoginRequest, response: Response, request: Request, db: Sessi
         if profile.approval_status == "rejected":
             raise HTTPException(status_code=403, detail={"message": "Seu cadastro foi recusado. Entre em contato com o gerente."})
 
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, db.get_bind(), user.id, payload.password, user.hashed_password)
+
     max_age = 60 * 60 * 24 * (7 if payload.keepConnected else 1)
     token = create_access_token(user.id)
     response.set_cookie(
@@ -84,7 +115,7 @@ def register(payload: RegisterRequest, response: Response, db: Session = Depends
 
     if payload.role == "manager":
         parts = payload.managerName.strip().split()
-        user = User(email=email, first_name=parts[0], last_name=" ".join(parts[1:]) or None, hashed_password=get_password_hash(payload.password))
+        user = User(email=email, first_name=parts[0], last_name=" ".join(parts[1:]) or None, hashed_password=password_hasher.hash(payload.password))
         db.add(user)
         db.flush()
 
@@ -126,7 +157,7 @@ def register(payload: RegisterRequest, response: Response, db: Session = Depends
     if not shop:
         raise HTTPException(status_code=404, detail={"message": "ID da loja não encontrado.", "field": "shopCode"})
     parts = payload.name.strip().split()
-    user = User(email=email, first_name=parts[0], last_name=" ".join(parts[1:]) or None, hashed_password=get_password_hash(payload.password))
+    user = User(email=email, first_name=parts[0], last_name=" ".join(parts[1:]) or None, hashed_password=password_hasher.hash(payload.password))
     db.add(user)
     db.flush()
 
@@ -154,7 +185,10 @@ def register(payload: RegisterRequest, response: Response, db: Session = Depends
 
 
 @router.post("/api/auth/logout")
-def logout(response: Response):
+def logout(response: Response, request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        identity_cache.invalidate_token(token)
     response.delete_cookie("access_token")
     return {"ok": True}
 
@@ -204,6 +238,14 @@ def decide_professional(
         target.approval_at = None
         message = "Profissional recusado."
 
-    db.add(ProfessionalApproval(professional_user_id=professional_user_id, manager_user_id=manager_user.id, action=payload.action))
     db.commit()
+    identity_cache.invalidate_user(professional_user_id)
+    # Histórico de aprovações e audit log saem da transação da requisição.
+    audit_writer.record_approval(professional_user_id, manager_user.id, payload.action)
+    audit_writer.record(
+        manager_user.id,
+        f"professional.{payload.action}",
+        shop_id=manager_profile.shop_id,
+        metadata={"professionalUserId": professional_user_id},
+    )
     return {"profile": {"userId": target.user_id, "approvalStatus": target.approval_status}, "message": message}
@@ -1,10 +1,17 @@
-from fastapi import Depends, HTTPException, Request, status
+import secrets
+import time
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
-from app.db.session import SessionLocal
+from app.core.config import settings
+from app.core.identity_cache import detached_copy, identity_cache
+from app.core.security import decode_access_claims
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.models.user import User
 from app.models.profile import Profile
+from app.models.shop import Shop
 from app.core.uuid_utils import normalize_uuid_str
 
 
@@ -16,24 +23,97 @@ def get_db():
         db.close()
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def access_token(request: Request) -> str:
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    user_id = normalize_uuid_str(
-        decode_access_token(token),
+    return token
+
+
+def token_user_id(claims: dict) -> str:
+    return normalize_uuid_str(
+        claims["sub"],
         field_name="token subject",
         status_code=status.HTTP_401_UNAUTHORIZED,
         message="Invalid token",
     )
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+
+
+def identity_statement(user_id: str):
+    return (
+        select(User, Profile, Shop)
+        .outerjoin(Profile, Profile.user_id == User.id)
+        .outerjoin(Shop, Shop.id == Profile.shop_id)
+        .where(User.id == user_id)
+        .limit(1)
+    )
+
+
+def cache_identity(token: str, user_id: str, claims: dict, row) -> None:
+    max_age = claims["exp"] - time.time() if "exp" in claims else None
+    identity_cache.set(token, user_id, tuple(detached_copy(item) for item in row), max_age=max_age)
+
+
+def get_identity(request: Request, db: Session = Depends(get_db)) -> tuple[User, Profile | None, Shop | None]:
+    """Load user, profile and shop in a single joined query, cached on ``request.state``."""
+    identity = getattr(request.state, "identity", None)
+    if identity is not None:
+        return identity
+
+    token = access_token(request)
+    snapshot = identity_cache.get(token)
+    if snapshot is not None:
+        request.state.identity = tuple(db.merge(item, load=False) if item is not None else None for item in snapshot)
+        return request.state.identity
+
+    claims = decode_access_claims(token)
+    user_id = token_user_id(claims)
+    row = db.execute(identity_statement(user_id)).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    request.state.identity = tuple(row)
+    cache_identity(token, user_id, claims, row)
+    return request.state.identity
+
+
+async def get_identity_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> tuple[User, Profile | None, Shop | None]:
+    """Async twin of ``get_identity`` for read-only handlers; objects come back detached."""
+    identity = getattr(request.state, "async_identity", None)
+    if identity is not None:
+        return identity
+
+    token = access_token(request)
+    snapshot = identity_cache.get(token)
+    if snapshot is not None:
+        # O snapshot do cache é compartilhado entre threads: cada requisição recebe a sua cópia.
+        request.state.async_identity = tuple(detached_copy(item) for item in snapshot)
+        return request.state.async_identity
+
+    claims = decode_access_claims(token)
+    user_id = token_user_id(claims)
+    row = (await db.execute(identity_statement(user_id))).first()
+    if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    cache_identity(token, user_id, claims, row)
+    request.state.async_identity = tuple(row)
+    return request.state.async_identity
+
 
+def get_current_user(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity)) -> User:
+    return identity[0]
 
-def get_current_profile(user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> Profile | None:
-    return db.query(Profile).filter(Profile.user_id == user.id).first()
+
+def get_current_profile(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity)) -> Profile | None:
+    return identity[1]
+
+
+def get_current_shop(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity)) -> Shop | None:
+    return identity[2]
 
 
 def require_manager(profile: Profile | None = Depends(get_current_profile)) -> Profile:
@@ -46,3 +126,32 @@ def require_active_professional(profile: Profile | None = Depends(get_current_pr
     if not profile or profile.role != "professional" or profile.approval_status != "active":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Aguardando aprovação para acessar o painel.")
     return profile
+
+
+async def get_current_user_async(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity_async)) -> User:
+    return identity[0]
+
+
+async def get_current_profile_async(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity_async)) -> Profile | None:
+    return identity[1]
+
+
+async def get_current_shop_async(identity: tuple[User, Profile | None, Shop | None] = Depends(get_identity_async)) -> Shop | None:
+    return identity[2]
+
+
+def require_internal_token(
+    x_internal_token: str | None = Header(None),
+    authorization: str | None = Header(None),
+) -> None:
+    if settings.internal_token is None:
+        # Sem token configurado, os endpoints internos não existem em produção.
+        if settings.env == "production":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        return
+    # X-Internal-Token ou "Authorization: Bearer" (formato que o Prometheus envia no scrape).
+    token = x_internal_token
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token or not secrets.compare_digest(token, settings.internal_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
@@ -0,0 +1,87 @@
+from collections.abc import Iterable
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api import auth, uploads
+from app.api.deps import require_internal_token
+from app.core.config import settings
+from app.core.metrics import family, format_labels, registry
+from app.core.password_hashing import password_hasher
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_internal_token)])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def engine_pools() -> dict:
+    return {"sync": engine.pool, "async": async_engine.pool}
+
+
+def collect_pool_metrics() -> Iterable[str]:
+    statuses = {name: pool_status(name, pool) for name, pool in engine_pools().items()}
+    labels = ("pool",)
+    for metric, key, documentation in (
+        ("db_pool_size", "size", "Conexões fixas do pool."),
+        ("db_pool_checked_out", "checkedOut", "Conexões em uso."),
+        ("db_pool_overflow", "overflow", "Conexões abertas acima de pool_size."),
+    ):
+        yield from family(metric, "gauge", documentation, labels, [((name,), status[key]) for name, status in statuses.items() if key in status])
+    yield from family(
+        "db_pool_timeouts_total", "counter", "Checkouts que esgotaram pool_timeout.", labels,
+        [((name,), status["timeouts"]) for name, status in statuses.items() if "timeouts" in status],
+    )
+
+    yield "# HELP db_pool_wait_seconds Espera por uma conexão livre no checkout."
+    yield "# TYPE db_pool_wait_seconds histogram"
+    for name, status in statuses.items():
+        if "waitMs" not in status:
+            continue
+        wait = status["waitMs"]
+        for bound, count in wait["buckets"].items():
+            le = 'le="+Inf"' if bound == "+Inf" else f'le="{int(bound) / 1000}"'
+            yield f"db_pool_wait_seconds_bucket{format_labels(labels, (name,), le)} {count}"
+        yield f"db_pool_wait_seconds_sum{format_labels(labels, (name,))} {wait['sumMs'] / 1000}"
+        yield f"db_pool_wait_seconds_count{format_labels(labels, (name,))} {wait['count']}"
+
+
+def collect_rate_limiter_metrics() -> Iterable[str]:
+    limiters = {"auth": auth.rate_limiter, "uploads": uploads.rate_limiter}
+    return family(
+        "rate_limiter_rejections_total", "counter", "Requisições recusadas com 429 pelo rate limiter.", ("limiter",),
+        [((name,), limiter.rejections) for name, limiter in limiters.items()],
+    )
+
+
+def collect_password_hasher_metrics() -> Iterable[str]:
+    stats = password_hasher.metrics()
+    yield from family("password_hash_in_flight", "gauge", "Hashes/verificações bcrypt na fila ou rodando.", (), [((), stats["in_flight"])])
+    yield from family(
+        "password_hash_operations_total", "counter", "Hashes/verificações bcrypt por resultado (rejected: fila cheia, 503).", ("result",),
+        [((result,), stats[result]) for result in ("completed", "failed", "rejected")],
+    )
+    yield from family(
+        "password_hash_busy_seconds_total", "counter", "Tempo somado das chamadas de hash/verificação.", (), [((), stats["busy_seconds"])]
+    )
+
+
+registry.collectors.extend([collect_pool_metrics, collect_rate_limiter_metrics, collect_password_hasher_metrics])
+
+
+@router.get("/pool")
+def get_pool_status():
+    # Conexões que um processo pode abrir no pico: some isso por worker/instância contra o max_connections do Postgres.
+    per_engine = settings.db_pool_size + settings.db_max_overflow
+    return {
+        "maxConnectionsPerProcess": 2 * per_engine,
+        "prePing": settings.db_pool_pre_ping,
+        "recycleSeconds": settings.db_pool_recycle_seconds,
+        "pools": {name: pool_status(name, pool) for name, pool in engine_pools().items()},
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
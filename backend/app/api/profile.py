@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user, get_current_profile
+from app.api.deps import get_db, get_current_user, get_current_profile, get_current_shop
+from app.core.identity_cache import identity_cache
 from app.models.profile import Profile
 from app.models.shop import Shop
 from app.schemas.profile import ProfileBase, ProfileUpsert, ProfessionalAvailabilityUpdate
@@ -30,12 +31,14 @@ def to_profile_base(profile: Profile) -> ProfileBase:
 
 
 @router.get("/api/me")
-def get_me(user: User = Depends(get_current_user), profile: Profile | None = Depends(get_current_profile), db: Session = Depends(get_db)):
+def get_me(
+    user: User = Depends(get_current_user),
+    profile: Profile | None = Depends(get_current_profile),
+    db_shop: Shop | None = Depends(get_current_shop),
+):
     shop = None
-    if profile and profile.shop_id:
-        db_shop = db.query(Shop).filter(Shop.id == profile.shop_id).first()
-        if db_shop:
-            shop = ShopBase(id=db_shop.id, name=db_shop.name, code=db_shop.code, managerUserId=db_shop.manager_user_id)
+    if db_shop:
+        shop = ShopBase(id=db_shop.id, name=db_shop.name, code=db_shop.code, managerUserId=db_shop.manager_user_id)
 
     return {
         "user": UserBase(id=user.id, email=user.email, firstName=user.first_name, lastName=user.last_name, profileImageUrl=user.profile_image_url),
@@ -45,8 +48,12 @@ def get_me(user: User = Depends(get_current_user), profile: Profile | None = Dep
 
 
 @router.post("/api/profile", response_model=ProfileBase)
-def upsert_profile(payload: ProfileUpsert, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    profile = db.query(Profile).filter(Profile.user_id == user.id).first()
+def upsert_profile(
+    payload: ProfileUpsert,
+    user: User = Depends(get_current_user),
+    profile: Profile | None = Depends(get_current_profile),
+    db: Session = Depends(get_db),
+):
     if profile:
         profile.role = payload.role
         profile.cpf = payload.cpf
@@ -55,6 +62,7 @@ def upsert_profile(payload: ProfileUpsert, user: User = Depends(get_current_user
         profile = Profile(user_id=user.id, role=payload.role, cpf=payload.cpf, phone=payload.phone, is_verified=False)
         db.add(profile)
     db.commit()
+    identity_cache.invalidate_user(user.id)
     db.refresh(profile)
     return to_profile_base(profile)
 
@@ -71,5 +79,6 @@ def set_professional_availability(
 
     profile.availability = payload.availability
     db.commit()
+    identity_cache.invalidate_user(user.id)
     db.refresh(profile)
     return to_profile_base(profile)
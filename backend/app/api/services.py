@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_manager, get_current_user
+from app.api.deps import get_async_db, get_db, require_manager, get_current_user, get_current_user_async
+from app.core.audit import audit_writer
+from app.core.service_catalog import service_catalog
+from app.models.profile import Profile
 from app.models.user import User
 from app.models.service import Service
 from app.schemas.service import ServiceBase, ServiceCreate, ServiceUpdate
@@ -10,24 +14,23 @@ router = APIRouter(prefix="/api/services", tags=["services"])
 
 
 @router.get("", response_model=list[ServiceBase])
-def list_services(db: Session = Depends(get_db), _user: User = Depends(get_current_user)):
-    services = db.query(Service).order_by(Service.id).all()
-    return [
-        ServiceBase(
-            id=service.id,
-            name=service.name,
-            type=service.type,
-            price=service.price,
-            commissionRate=service.commission_rate,
-            active=service.active,
-            description=service.description,
-        )
-        for service in services
-    ]
+async def list_services(request: Request, db: AsyncSession = Depends(get_async_db), _user: User = Depends(get_current_user_async)):
+    # Acerto no cache não toca o banco; na falta, a carga síncrona roda sobre a conexão async.
+    catalog = service_catalog.cached() or await db.run_sync(service_catalog.get)
+    headers = {"ETag": catalog.etag, "Cache-Control": "private, no-cache"}
+    # Catálogo muda poucas vezes por mês: o cliente revalida e recebe 304 sem corpo.
+    if catalog.etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.body, media_type="application/json", headers=headers)
 
 
 @router.post("", response_model=ServiceBase, status_code=201, dependencies=[Depends(require_manager)])
-def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
+def create_service(
+    payload: ServiceCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    manager_profile: Profile = Depends(require_manager),
+):
     service = Service(
         name=payload.name,
         type=payload.type,
@@ -38,7 +41,9 @@ def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
     )
     db.add(service)
     db.commit()
+    service_catalog.invalidate()
     db.refresh(service)
+    audit_writer.record(user.id, "service.create", shop_id=manager_profile.shop_id, metadata={"serviceId": service.id, **payload.model_dump()})
     return ServiceBase(
         id=service.id,
         name=service.name,
@@ -51,13 +56,22 @@ def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
 
 
 @router.patch("/{service_id}", response_model=ServiceBase, dependencies=[Depends(require_manager)])
-def update_service(service_id: int, payload: ServiceUpdate, db: Session = Depends(get_db)):
+def update_service(
+    service_id: int,
+    payload: ServiceUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    manager_profile: Profile = Depends(require_manager),
+):
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    for field, value in payload.model_dump(exclude_unset=True).items():
+    changes = payload.model_dump(exclude_unset=True)
+    for field, value in changes.items():
         setattr(service, field if field != "commissionRate" else "commission_rate", value)
     db.commit()
+    service_catalog.invalidate()
+    audit_writer.record(user.id, "service.update", shop_id=manager_profile.shop_id, metadata={"serviceId": service_id, **changes})
     db.refresh(service)
     return ServiceBase(
         id=service.id,
@@ -71,10 +85,17 @@ def update_service(service_id: int, payload: ServiceUpdate, db: Session = Depend
 
 
 @router.delete("/{service_id}", status_code=204, dependencies=[Depends(require_manager)])
-def delete_service(service_id: int, db: Session = Depends(get_db)):
+def delete_service(
+    service_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    manager_profile: Profile = Depends(require_manager),
+):
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     db.delete(service)
     db.commit()
+    service_catalog.invalidate()
+    audit_writer.record(user.id, "service.delete", shop_id=manager_profile.shop_id, metadata={"serviceId": service_id, "name": service.name})
     return None
@@ -1,64 +1,129 @@
-from datetime import datetime, timedelta
-from collections import defaultdict
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, require_manager
-from app.models.appointment import Appointment
+from app.models.appointment_daily_rollup import AppointmentDailyRollup as Rollup
+from app.models.profile import Profile
 from app.models.user import User
 from app.schemas.stats import StatsResponse, ProfessionalStats, RevenueByDay
 
 router = APIRouter(prefix="/api/stats", tags=["stats"], dependencies=[Depends(require_manager)])
 
+MAX_BUCKETS = 400
 
-@router.get("", response_model=StatsResponse)
-def get_stats(db: Session = Depends(get_db)):
-    appointments = db.query(Appointment).all()
-
-    total_cuts = len(appointments)
-    total_revenue = sum(a.price for a in appointments if a.status == "confirmed")
-    total_commission = sum(int(a.price * a.commission_rate / 100) for a in appointments if a.status == "confirmed")
-    pending_approvals = sum(1 for a in appointments if a.status == "pending")
-
-    professionals: dict[str, ProfessionalStats] = {}
-    for appt in appointments:
-        user = db.query(User).filter(User.id == appt.professional_id).first()
-        name = user.first_name or "Profissional"
-        prof = professionals.get(appt.professional_id)
-        if not prof:
-            prof = ProfessionalStats(
-                id=appt.professional_id,
-                name=name,
-                totalCuts=0,
-                totalRevenue=0,
-                grossCommission=0,
+
+def parse_day(value: str | None, field_name: str) -> date | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"{field_name} must be an ISO date") from exc
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day + timedelta(days=7)
+    if granularity == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def bucket_label(day: date, granularity: str) -> str:
+    return day.strftime("%m/%Y" if granularity == "month" else "%d/%m")
+
+
+def parse_window(start_date: str | None, end_date: str | None) -> tuple[date | None, date | None]:
+    start = parse_day(start_date, "startDate")
+    end = parse_day(end_date, "endDate")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="startDate must be before endDate")
+    return start, end
+
+
+def series_buckets(start: date | None, end: date | None, granularity: str) -> tuple[date, date, list[date]]:
+    # Sem janela explícita, a série cobre os últimos 7 dias (comportamento original do dashboard).
+    series_end = end or datetime.utcnow().date()
+    series_start = start or series_end - timedelta(days=6)
+    buckets: list[date] = []
+    cursor = bucket_start(series_start, granularity)
+    while cursor <= series_end:
+        buckets.append(cursor)
+        if len(buckets) > MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail="Intervalo muito grande para a granularidade escolhida")
+        cursor = next_bucket(cursor, granularity)
+    return series_start, series_end, buckets
+
+
+def professional_totals_statement(shop_id: int, start: date | None, end: date | None):
+    # Lê apenas o rollup diário da loja do gerente (índice shop_id, day), nunca a tabela de atendimentos.
+    filters = [Rollup.shop_id == shop_id]
+    if start:
+        filters.append(Rollup.day >= start)
+    if end:
+        filters.append(Rollup.day <= end)
+    return (
+        select(
+            Rollup.professional_id,
+            User.first_name,
+            func.sum(Rollup.cuts),
+            func.sum(Rollup.confirmed_revenue),
+            func.sum(Rollup.gross_commission),
+            func.sum(Rollup.pending_count),
+        )
+        .outerjoin(User, User.id == Rollup.professional_id)
+        .where(*filters)
+        .group_by(Rollup.professional_id, User.first_name)
+        .having(func.sum(Rollup.cuts) > 0)
+        .order_by(func.min(Rollup.id))
+    )
+
+
+def daily_revenue_statement(shop_id: int, series_start: date, series_end: date):
+    return (
+        select(Rollup.day, func.sum(Rollup.confirmed_revenue))
+        .where(Rollup.shop_id == shop_id, Rollup.day >= series_start, Rollup.day <= series_end)
+        .group_by(Rollup.day)
+    )
+
+
+def build_stats(rows, daily_rows, buckets: list[date], granularity: str) -> StatsResponse:
+    professionals: list[ProfessionalStats] = []
+    total_cuts = total_revenue = total_commission = pending_approvals = 0
+    for professional_id, first_name, cuts, revenue, commission, pending in rows:
+        total_cuts += cuts
+        total_revenue += revenue
+        total_commission += commission
+        pending_approvals += pending
+        professionals.append(
+            ProfessionalStats(
+                id=professional_id,
+                name=first_name or "Profissional",
+                totalCuts=cuts,
+                totalRevenue=revenue,
+                grossCommission=commission,
                 standardDeductions=0,
                 individualDeductions=0,
                 totalDeductions=0,
-                netPayable=0,
+                netPayable=commission,
             )
-            professionals[appt.professional_id] = prof
-        prof.totalCuts += 1
-        if appt.status == "confirmed":
-            prof.totalRevenue += appt.price
-            prof.grossCommission += int(appt.price * appt.commission_rate / 100)
-
-    for prof in professionals.values():
-        prof.totalDeductions = prof.standardDeductions + prof.individualDeductions
-        prof.netPayable = prof.grossCommission - prof.totalDeductions
-
-    revenue_by_day: list[RevenueByDay] = []
-    today = datetime.utcnow().date()
-    daily_map = defaultdict(int)
-    for appt in appointments:
-        if appt.status != "confirmed":
-            continue
-        day_key = appt.date.date()
-        daily_map[day_key] += appt.price
-
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        revenue_by_day.append(RevenueByDay(day=day.strftime("%d/%m"), total=daily_map.get(day, 0)))
+        )
+
+    series_map: dict[date, int] = dict.fromkeys(buckets, 0)
+    for day, total in daily_rows:
+        series_map[bucket_start(day, granularity)] += total
+    revenue_by_day = [RevenueByDay(day=bucket_label(bucket, granularity), total=series_map[bucket]) for bucket in buckets]
 
     total_deductions = 0
     net_payable = total_commission - total_deductions
@@ -70,6 +135,21 @@ def get_stats(db: Session = Depends(get_db)):
         totalDeductions=total_deductions,
         netPayable=net_payable,
         pendingApprovals=pending_approvals,
-        professionals=list(professionals.values()),
+        professionals=professionals,
         revenueByDay=revenue_by_day,
     )
+
+
+@router.get("", response_model=StatsResponse)
+def get_stats(
+    db: Session = Depends(get_db),
+    manager_profile: Profile = Depends(require_manager),
+    start_date: str | None = Query(None, alias="startDate"),
+    end_date: str | None = Query(None, alias="endDate"),
+    granularity: Literal["day", "week", "month"] = Query("day"),
+):
+    start, end = parse_window(start_date, end_date)
+    series_start, series_end, buckets = series_buckets(start, end, granularity)
+    rows = db.execute(professional_totals_statement(manager_profile.shop_id, start, end))
+    daily_rows = db.execute(daily_revenue_statement(manager_profile.shop_id, series_start, series_end))
+    return build_stats(rows, daily_rows, buckets, granularity)
@@ -1,102 +1,267 @@
 import hashlib
+import hmac
+import mimetypes
 import os
 import secrets
+import tempfile
 from pathlib import Path
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.audit import audit_writer
+from app.core.cloudinary import cloudinary_client, decode_data_url
 from app.core.config import settings
+from app.core.identity_cache import identity_cache
+from app.core.metrics import upload_bytes
 from app.core.rate_limiter import RateLimiter
+from app.core.receipt_fingerprint import fingerprint_receipt
+from app.core.upload_pipeline import local_upload_url, media_upload_job, upload_folder, upload_pipeline
 from app.api.deps import get_current_user, get_current_profile, get_db
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.media_upload import MediaUpload
-from app.schemas.upload import UploadRequest, UploadResponse, CloudinaryUploadRequest
+from app.models.receipt_proof import ReceiptProof
+from app.schemas.upload import UploadRequest, UploadResponse, CloudinaryUploadRequest, UploadJobStatus
 
 router = APIRouter(prefix="/api/uploads", tags=["uploads"])
 rate_limiter = RateLimiter(max_requests=20, window_seconds=60)
 
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def sign_upload(token: str, name: str, size: int) -> str:
+    """HMAC binding the declared size to the upload URL, so any worker can enforce it."""
+    message = f"{token}/{name}/{size}".encode()
+    return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+class UploadWriter:
+    """Writes fixed-size chunks to a temp file next to the destination, hashing on the way."""
+
+    def __init__(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=directory, prefix=".", suffix=".part", delete=False)
+        self.digest = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def commit(self, destination: Path) -> None:
+        self.file.close()
+        os.replace(self.file.name, destination)
+
+    def discard(self) -> None:
+        self.file.close()
+        Path(self.file.name).unlink(missing_ok=True)
+
 
 @router.post("/request-url", response_model=UploadResponse)
 async def request_upload_url(payload: UploadRequest, request: Request, _user: User = Depends(get_current_user)):
-    rate_limiter.hit(f"upload:{request.client.host}")
+    # Com RATE_LIMIT_BACKEND=database o hit é uma consulta síncrona: fora do event loop.
+    await run_in_threadpool(rate_limiter.hit, f"upload:{request.client.host}")
+    if payload.size <= 0 or payload.size > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail={"message": "Arquivo vazio ou maior que o permitido."})
     token = secrets.token_hex(16)
     safe_name = Path(payload.name).name
     object_path = f"uploads/{token}/{safe_name}"
-    upload_url = f"/api/uploads/{token}/{safe_name}"
+    upload_url = f"/api/uploads/{token}/{safe_name}?size={payload.size}&signature={sign_upload(token, safe_name, payload.size)}"
     file_url = f"/uploads/{token}/{safe_name}"
     return UploadResponse(uploadURL=upload_url, objectPath=object_path, fileUrl=file_url)
 
 
 @router.put("/{token}/{filename}")
-async def upload_file(token: str, filename: str, request: Request, _user: User = Depends(get_current_user)):
-    content = await request.body()
+async def upload_file(
+    token: str,
+    filename: str,
+    request: Request,
+    size: int = Query(...),
+    signature: str = Query(...),
+    _user: User = Depends(get_current_user),
+):
+    safe_name = Path(filename).name
+    if not hmac.compare_digest(signature, sign_upload(token, safe_name, size)):
+        raise HTTPException(status_code=403, detail={"message": "URL de upload inválida."})
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > size:
+        raise HTTPException(status_code=413, detail={"message": "Arquivo maior que o tamanho informado."})
+
+    # Corpo em blocos de tamanho fixo; disco e hash rodam fora do event loop.
     directory = Path(settings.upload_dir) / token
-    os.makedirs(directory, exist_ok=True)
-    file_path = directory / Path(filename).name
-    file_path.write_bytes(content)
-    return JSONResponse({"ok": True})
-
-
-async def upload_to_cloudinary(data_base64: str, folder: str):
-    cloud_name = settings.cloudinary_cloud_name
-    api_key = settings.cloudinary_api_key
-    api_secret = settings.cloudinary_api_secret
-    if not cloud_name or not api_key or not api_secret:
-        raise HTTPException(status_code=500, detail={"message": "Cloudinary não configurado."})
-
-    timestamp = str(int(__import__("time").time()))
-    signature_base = f"folder={folder}&timestamp={timestamp}{api_secret}"
-    signature = hashlib.sha1(signature_base.encode()).hexdigest()
-    payload = {
-        "file": data_base64,
-        "folder": folder,
-        "timestamp": timestamp,
-        "api_key": api_key,
-        "signature": signature,
+    writer = await run_in_threadpool(UploadWriter, directory)
+    received = 0
+    buffer = bytearray()
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > size:
+                raise HTTPException(status_code=413, detail={"message": "Arquivo maior que o tamanho informado."})
+            buffer += chunk
+            while len(buffer) >= UPLOAD_CHUNK_SIZE:
+                block = bytes(buffer[:UPLOAD_CHUNK_SIZE])
+                del buffer[:UPLOAD_CHUNK_SIZE]
+                await run_in_threadpool(writer.write, block)
+        if buffer:
+            await run_in_threadpool(writer.write, bytes(buffer))
+        await run_in_threadpool(writer.commit, directory / safe_name)
+    except BaseException:
+        await run_in_threadpool(writer.discard)
+        raise
+    upload_bytes.inc("direct", amount=received)
+    return JSONResponse({"ok": True, "size": received, "sha256": writer.digest.hexdigest()})
+
+
+def receipt_directory(digest: str) -> Path:
+    return Path(settings.upload_dir) / "receipts" / digest[:2]
+
+
+def store_receipt(directory: Path, name: str, data: bytes) -> Path:
+    if (directory / name).exists():
+        return directory / name
+    writer = UploadWriter(directory)
+    try:
+        writer.write(data)
+        writer.commit(directory / name)
+    except BaseException:
+        writer.discard()
+        raise
+    return directory / name
+
+
+def submit_receipt_upload(db: Session, media: MediaUpload) -> None:
+    if not upload_pipeline.submit(media_upload_job(media, db.get_bind())):
+        media.status = "failed"
+        media.error = "queue full"
+        db.commit()
+        raise HTTPException(status_code=503, detail={"message": "Fila de uploads cheia. Tente novamente."}, headers={"Retry-After": "5"})
+
+
+def stored_receipt_response(db: Session, proof: ReceiptProof, response: Response) -> dict:
+    media = db.get(MediaUpload, proof.media_id)
+    if media.status == "failed":
+        # Reenvio de um comprovante cujo job falhou (ex.: fila cheia): volta para a fila em vez de devolver o job morto.
+        media.status = "pending"
+        media.error = None
+        db.commit()
+        submit_receipt_upload(db, media)
+    done = media.status == "done"
+    response.status_code = 200 if done else 202
+    return {
+        "jobId": media.id,
+        "status": media.status,
+        "secure_url": media.secure_url if done else proof.local_url,
+        "public_id": media.public_id,
+        "asset_id": media.asset_id,
     }
-    async with httpx.AsyncClient(timeout=30) as client:
-        res = await client.post(f"https://api.cloudinary.com/v1_1/{cloud_name}/image/upload", data=payload)
-    if res.status_code >= 400:
-        raise HTTPException(status_code=502, detail={"message": "Falha no upload para Cloudinary."})
-    return res.json()
 
 
-@router.post("", status_code=201)
-async def cloudinary_upload(
-    payload: CloudinaryUploadRequest,
-    request: Request,
-    user: User = Depends(get_current_user),
-    profile: Profile | None = Depends(get_current_profile),
-    db: Session = Depends(get_db),
-):
-    rate_limiter.hit(f"cloudinary-upload:{request.client.host}")
-    if not profile or not profile.shop_id:
-        raise HTTPException(status_code=400, detail={"message": "Perfil sem loja vinculada."})
+def save_receipt(db: Session, response: Response, user: User, profile: Profile, payment_id, data: bytes, content_type: str) -> dict:
+    """Fingerprint, store and register a receipt, then queue its Cloudinary upload; blocking, run it in the threadpool."""
+    # Comprovante: endereçado pelo conteúdo; o mesmo arquivo é gravado e enviado uma única vez.
+    digest, phash = fingerprint_receipt(data, content_type)
+    existing = db.scalar(select(ReceiptProof).where(ReceiptProof.sha256 == digest))
+    if existing:
+        return stored_receipt_response(db, existing, response)
 
-    payment_id = payload.paymentId if payload.paymentId is not None else payload.appointmentId
-    folder = (
-        f"salons/{profile.shop_id}/professionals/{user.id}/profile"
-        if payload.type == "profile"
-        else f"salons/{profile.shop_id}/payments/{user.id}/receipts"
+    local_path = store_receipt(receipt_directory(digest), f"{digest}{mimetypes.guess_extension(content_type) or ''}", data)
+    local_url = local_upload_url(str(local_path))
+    media = MediaUpload(
+        type="receipt",
+        shop_id=profile.shop_id,
+        professional_id=user.id,
+        payment_id=payment_id,
+        status="pending",
+        local_path=str(local_path),
+        content_type=content_type,
     )
-    cloudinary = await upload_to_cloudinary(payload.dataBase64, folder)
+    db.add(media)
+    db.flush()
+    db.add(ReceiptProof(sha256=digest, perceptual_hash=phash, media_id=media.id, local_url=local_url))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Outro envio do mesmo arquivo venceu a corrida; reaproveita o registro dele.
+        db.rollback()
+        return stored_receipt_response(db, db.scalar(select(ReceiptProof).where(ReceiptProof.sha256 == digest)), response)
+
+    submit_receipt_upload(db, media)
+    audit_writer.record(user.id, "upload.receipt", shop_id=profile.shop_id, metadata={"mediaId": media.id, "sha256": digest, "size": len(data)})
+    response.status_code = 202
+    return {"jobId": media.id, "status": "pending", "secure_url": local_url, "public_id": None, "asset_id": None}
+
 
+def save_profile_image(db: Session, user: User, profile: Profile, payment_id, content_type: str, cloudinary: dict, size: int) -> int:
     media = MediaUpload(
-        type=payload.type,
+        type="profile",
         shop_id=profile.shop_id,
         professional_id=user.id,
         payment_id=payment_id,
+        status="done",
+        content_type=content_type,
         secure_url=cloudinary["secure_url"],
         public_id=cloudinary["public_id"],
         asset_id=cloudinary["asset_id"],
     )
     db.add(media)
-    if payload.type == "profile":
-        user.profile_image_url = cloudinary["secure_url"]
+    user.profile_image_url = cloudinary["secure_url"]
     db.commit()
+    identity_cache.invalidate_user(user.id)
+    audit_writer.record(user.id, "upload.profile", shop_id=profile.shop_id, metadata={"mediaId": media.id, "size": size})
+    return media.id
+
+
+@router.post("", status_code=201)
+async def cloudinary_upload(
+    payload: CloudinaryUploadRequest,
+    request: Request,
+    response: Response,
+    user: User = Depends(get_current_user),
+    profile: Profile | None = Depends(get_current_profile),
+    db: Session = Depends(get_db),
+):
+    await run_in_threadpool(rate_limiter.hit, f"cloudinary-upload:{request.client.host}")
+    if not profile or not profile.shop_id:
+        raise HTTPException(status_code=400, detail={"message": "Perfil sem loja vinculada."})
+
+    payment_id = payload.paymentId if payload.paymentId is not None else payload.appointmentId
+    folder = upload_folder(payload.type, profile.shop_id, user.id)
+    data, content_type = decode_data_url(payload.dataBase64)
+    if len(data) > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail={"message": "Arquivo maior que o permitido."})
+    upload_bytes.inc(payload.type, amount=len(data))
+
+    # Sessão síncrona: todo acesso ao banco sai do event loop.
+    if payload.type == "receipt":
+        return await run_in_threadpool(save_receipt, db, response, user, profile, payment_id, data, content_type)
 
-    return {"secure_url": cloudinary["secure_url"], "public_id": cloudinary["public_id"], "asset_id": cloudinary["asset_id"]}
+    cloudinary = await cloudinary_client.upload(data, content_type, folder)
+    media_id = await run_in_threadpool(save_profile_image, db, user, profile, payment_id, content_type, cloudinary, len(data))
+    return {"jobId": media_id, "status": "done", "secure_url": cloudinary["secure_url"], "public_id": cloudinary["public_id"], "asset_id": cloudinary["asset_id"]}
+
+
+@router.get("/jobs/{job_id}", response_model=UploadJobStatus)
+def get_upload_job(
+    job_id: int,
+    user: User = Depends(get_current_user),
+    profile: Profile | None = Depends(get_current_profile),
+    db: Session = Depends(get_db),
+):
+    media = db.query(MediaUpload).filter(MediaUpload.id == job_id).first()
+    is_owner = media is not None and media.professional_id == user.id
+    is_shop_manager = media is not None and profile is not None and profile.role == "manager" and profile.shop_id == media.shop_id
+    if not is_owner and not is_shop_manager:
+        raise HTTPException(status_code=404, detail={"message": "Upload não encontrado."})
+    return UploadJobStatus(
+        jobId=media.id,
+        type=media.type,
+        status=media.status,
+        secure_url=media.secure_url,
+        public_id=media.public_id,
+        asset_id=media.asset_id,
+        error=media.error,
+    )
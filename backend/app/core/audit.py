@@ -0,0 +1,192 @@
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import Table
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+from app.models.professional_approval import ProfessionalApproval
+
+logger = logging.getLogger(__name__)
+
+
+def is_connection_error(exc: Exception) -> bool:
+    """Errors worth retrying later: the database was unreachable, not the rows wrong."""
+    return isinstance(exc, (OperationalError, InterfaceError)) or (isinstance(exc, DBAPIError) and exc.connection_invalidated)
+
+
+class AuditWriter:
+    """Buffers audit rows in memory and bulk-inserts them from a background thread.
+
+    ``record`` only appends to a deque under a lock, so the request path never
+    waits on the database. The thread flushes every ``flush_interval`` seconds,
+    or as soon as ``batch_size`` rows are pending; ``stop`` drains what is left.
+    Rows are timestamped when recorded, not when written.
+
+    A batch that fails on a connection error goes back to the front of the queue,
+    up to ``max_retries`` failures in a row. Any other error means some row is
+    bad: the batch is retried one row at a time and the rows that still fail
+    are logged and dropped, so they never block the rows behind them.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int, max_retries: int = 10) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.bind: Engine | None = None
+        self.written = 0
+        self.dropped = 0
+        self._retries = 0
+        self._pending: deque[tuple[Table, dict]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(
+        self,
+        actor_id: str,
+        action: str,
+        *,
+        shop_id: int | None = None,
+        appointment_id: int | None = None,
+        metadata: dict | None = None,
+    ) -> None:
+        self._enqueue(
+            AuditLog.__table__,
+            {
+                "actor_id": actor_id,
+                "shop_id": shop_id,
+                "appointment_id": appointment_id,
+                "action": action,
+                "metadata": json.dumps(metadata, ensure_ascii=False) if metadata is not None else None,
+                "created_at": datetime.utcnow(),
+            },
+        )
+
+    def record_approval(self, professional_user_id: str, manager_user_id: str, action: str) -> None:
+        self._enqueue(
+            ProfessionalApproval.__table__,
+            {
+                "professional_user_id": professional_user_id,
+                "manager_user_id": manager_user_id,
+                "action": action,
+                "created_at": datetime.utcnow(),
+            },
+        )
+
+    def _enqueue(self, table: Table, values: dict) -> None:
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                # Banco fora do ar por muito tempo: descarta o mais antigo em vez de crescer sem limite.
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((table, values))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def start(self, bind: Engine) -> None:
+        if self._thread is not None:
+            return
+        self.bind = bind
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the thread and write everything still buffered."""
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        if self._pending:
+            logger.error("Audit writer stopped with %s rows not written", len(self._pending))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self, bind: Engine | None = None) -> int:
+        """Write pending rows in batches of ``batch_size``; returns how many were written."""
+        bind = bind or self.bind
+        if bind is None:
+            return 0
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    return written
+                try:
+                    self._write(bind, batch)
+                except Exception as exc:
+                    if is_connection_error(exc):
+                        self._retry_later(batch, exc)
+                        return written
+                    logger.warning("Audit batch of %s rows failed (%r); writing rows one at a time", len(batch), exc)
+                    for index, row in enumerate(batch):
+                        try:
+                            self._write(bind, [row])
+                        except Exception as row_exc:
+                            if is_connection_error(row_exc):
+                                self._retry_later(batch[index:], row_exc)
+                                return written
+                            logger.error("Audit row dropped from %s: %r (%r)", row[0].name, row[1], row_exc)
+                            with self._lock:
+                                self.dropped += 1
+                        else:
+                            written += 1
+                            self.written += 1
+                else:
+                    written += len(batch)
+                    self.written += len(batch)
+                self._retries = 0
+
+    def _retry_later(self, rows: list[tuple[Table, dict]], exc: Exception) -> None:
+        self._retries += 1
+        if self._retries > self.max_retries:
+            logger.error("Audit flush failed %s times in a row (%r); dropping %s rows", self._retries, exc, len(rows))
+            self._retries = 0
+            with self._lock:
+                self.dropped += len(rows)
+            return
+        logger.warning("Audit flush failed (%r); %s rows kept for the next attempt", exc, len(rows))
+        with self._lock:
+            self._pending.extendleft(reversed(rows))
+
+    @staticmethod
+    def _write(bind: Engine, batch: list[tuple[Table, dict]]) -> None:
+        grouped: dict[Table, list[dict]] = {}
+        for table, values in batch:
+            grouped.setdefault(table, []).append(values)
+        with bind.begin() as conn:
+            for table, rows in grouped.items():
+                conn.execute(table.insert(), rows)
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    max_pending=settings.audit_max_pending,
+    max_retries=settings.audit_max_retries,
+)
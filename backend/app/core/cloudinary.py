@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import time
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def decode_data_url(value: str) -> tuple[bytes, str]:
+    """Split a ``data:<mime>;base64,<payload>`` string (or bare base64) into bytes and content type."""
+    content_type = "application/octet-stream"
+    payload = value
+    if value.startswith("data:"):
+        header, _, payload = value.partition(",")
+        content_type = header[len("data:") :].split(";")[0] or content_type
+    try:
+        return base64.b64decode(payload, validate=True), content_type
+    except (binascii.Error, ValueError) as exc:
+        raise HTTPException(status_code=400, detail={"message": "Arquivo em base64 inválido."}) from exc
+
+
+class CloudinaryClient:
+    """Application-lifetime HTTP client for Cloudinary uploads.
+
+    Keeps a pooled keep-alive connection set, sends files as multipart binary
+    and retries transport errors and 5xx responses with exponential backoff.
+    """
+
+    def __init__(self, base_url: str, timeout: float, max_connections: int, max_retries: int, backoff_seconds: float) -> None:
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff_seconds
+        self._client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    async def reachable(self, timeout: float) -> bool:
+        """Cheap reachability check for the readiness probe: any non-5xx answer from the API host."""
+        await self.start()
+        try:
+            res = await self._client.get("/", timeout=timeout)
+        except httpx.HTTPError:
+            return False
+        return res.status_code < 500
+
+    async def upload(self, data: bytes, content_type: str, folder: str) -> dict:
+        cloud_name = settings.cloudinary_cloud_name
+        api_key = settings.cloudinary_api_key
+        api_secret = settings.cloudinary_api_secret
+        if not cloud_name or not api_key or not api_secret:
+            raise HTTPException(status_code=500, detail={"message": "Cloudinary não configurado."})
+
+        await self.start()
+        timestamp = str(int(time.time()))
+        signature = hashlib.sha1(f"folder={folder}&timestamp={timestamp}{api_secret}".encode()).hexdigest()
+        form = {"folder": folder, "timestamp": timestamp, "api_key": api_key, "signature": signature}
+        url = f"/v1_1/{cloud_name}/image/upload"
+
+        res = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                res = await self._client.post(url, data=form, files={"file": ("upload", data, content_type)})
+            except httpx.TransportError:
+                logger.warning("Cloudinary upload attempt %s failed", attempt + 1, exc_info=True)
+                res = None
+                continue
+            if res.status_code < 500:
+                break
+            logger.warning("Cloudinary upload attempt %s returned %s", attempt + 1, res.status_code)
+
+        if res is None or res.status_code >= 400:
+            raise HTTPException(status_code=502, detail={"message": "Falha no upload para Cloudinary."})
+        return res.json()
+
+
+cloudinary_client = CloudinaryClient(
+    base_url=settings.cloudinary_api_base_url,
+    timeout=settings.cloudinary_timeout_seconds,
+    max_connections=settings.cloudinary_max_connections,
+    max_retries=settings.cloudinary_max_retries,
+    backoff_seconds=settings.cloudinary_retry_backoff_seconds,
+)
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+
+
+def detached_copy(instance):
+    """Column-only copy of an ORM instance, detached but keyed so ``Session.merge(load=False)`` needs no SELECT."""
+    if instance is None:
+        return None
+    mapper = inspect(instance).mapper
+    copy = mapper.class_(**{attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class IdentityCache:
+    """Bounded LRU of token -> (user_id, identity snapshot) with a short TTL.
+
+    Invalidation is per process; with several workers the TTL bounds how long
+    another worker may serve a stale profile.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> tuple | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, _user_id, snapshot = entry
+            if expires_at <= now:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return snapshot
+
+    def set(self, token: str, user_id: str, snapshot: tuple, max_age: float | None = None) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, user_id, snapshot)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            stale = [token for token, (_expires_at, cached_user_id, _snapshot) in self._entries.items() if cached_user_id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache(settings.identity_cache_max_entries, settings.identity_cache_ttl_seconds)
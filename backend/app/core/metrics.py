@@ -0,0 +1,205 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Limites (segundos) do histograma de latência por rota; o último balde é +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def family(name: str, kind: str, documentation: str, labelnames: tuple[str, ...], samples: Iterable[tuple[tuple, float]]) -> list[str]:
+    """Text lines for a metric read at scrape time (pool occupancy, limiter counters)."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labelnames, labels)} {format_value(value)}" for labels, value in samples)
+    return lines
+
+
+class _PerThread:
+    """One dict per writing thread, summed on scrape.
+
+    Each thread only ever writes its own shard, so the hot path takes no lock;
+    the lock is only taken once per thread to register the shard and when scraping.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._lock = threading.Lock()
+
+    def shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def items(self) -> Iterable[tuple[tuple, object]]:
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # list(dict.items()) é atômico sob o GIL: o dono do shard pode continuar escrevendo.
+            yield from list(shard.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = _PerThread()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._values.shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def totals(self) -> dict[tuple, float]:
+        totals: dict[tuple, float] = {}
+        for labels, value in self._values.items():
+            totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.totals().items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = _PerThread()
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._values.shard()
+        # [contagem por balde..., +Inf, soma]
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        merged: dict[tuple, list] = {}
+        for labels, counts in self._values.items():
+            total = merged.setdefault(labels, [0] * len(counts))
+            for index, count in enumerate(list(counts)):
+                total[index] += count
+        for labels, counts in sorted(merged.items()):
+            running = 0
+            for bound, hits in zip((*self.buckets, "+Inf"), counts[:-1]):
+                running += hits
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {running}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(counts[-1])}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {running}"
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Registry:
+    """Metrics plus scrape-time collectors, rendered in the Prometheus text format (0.0.4)."""
+
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Histogram] = []
+        self.collectors: list[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+request_latency = registry.register(
+    Histogram("http_request_duration_seconds", "Latência das requisições HTTP por rota.", ("method", "route", "status"))
+)
+requests_in_flight = registry.register(Gauge("http_requests_in_flight", "Requisições HTTP em andamento."))
+upload_bytes = registry.register(Counter("upload_bytes_total", "Bytes recebidos em uploads.", ("kind",)))
+
+
+def route_label(scope: dict) -> str:
+    # Template da rota (ex.: /api/appointments/{appointment_id}/status), nunca o path cru: cardinalidade fixa.
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "/uploads" if scope.get("path", "").startswith("/uploads/") else "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording in-flight requests and per-route latency."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            request_latency.observe(time.perf_counter() - started, scope["method"], route_label(scope), f"{status[0] // 100}xx")
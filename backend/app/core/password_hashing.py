@@ -0,0 +1,99 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated process pool with bounded admission.
+
+    At most ``max_pending`` hash/verify calls may be queued or running; beyond
+    that callers get 503 immediately instead of pinning request threads, so a
+    login burst cannot starve the rest of the API. ``workers=0`` hashes inline.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout_seconds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "in_flight": 0, "max_in_flight": 0, "busy_seconds": 0.0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"message": "Muitas autenticações simultâneas. Tente novamente em instantes."},
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            if self.workers <= 0:
+                result = fn(*args)
+            else:
+                future = self._get_executor().submit(fn, *args)
+                try:
+                    result = future.result(timeout=self.timeout)
+                except FuturesTimeoutError:
+                    future.cancel()
+                    logger.warning("Password hashing timed out after %.1fs", self.timeout)
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail={"message": "Autenticação demorou demais. Tente novamente em instantes."},
+                        headers={"Retry-After": "1"},
+                    ) from None
+            succeeded = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._stats["completed" if succeeded else "failed"] += 1
+                self._stats["busy_seconds"] += elapsed
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run(verify_password, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "max_pending": self.max_pending, **self._stats}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Password hashing pool stopped: %s", self.metrics())
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    timeout_seconds=settings.password_hash_timeout_seconds,
+)
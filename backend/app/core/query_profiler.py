@@ -0,0 +1,107 @@
+import logging
+import re
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Listas de parâmetros (IN expandido, VALUES) viram um único marcador: o formato não depende do tamanho.
+_PARAMETER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RepeatedQueryError(RuntimeError):
+    """The same statement shape ran more than ``sql_repeat_threshold`` times in one request."""
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueries:
+    """Statements and DB time of one request, filled in by the engine listeners."""
+
+    def __init__(self, method: str = "", path: str = "") -> None:
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.duration_ms = 0.0
+        self.shapes: dict[str, int] = {}
+
+    def record_statement(self, statement: str) -> None:
+        self.count += 1
+        shape = statement_shape(statement)
+        repeats = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = repeats
+        threshold = settings.sql_repeat_threshold
+        if threshold and repeats == threshold + 1:
+            message = f"N+1 suspeito em {self.method} {self.path}: consulta repetida mais de {threshold} vezes: {shape}"
+            if settings.sql_repeat_action == "raise":
+                raise RepeatedQueryError(message)
+            logger.warning(message)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms:.1f};desc="{self.count} queries"'
+
+
+current_queries: ContextVar[RequestQueries | None] = ContextVar("current_queries", default=None)
+
+# Chamados com (scope, RequestQueries) ao fim de cada requisição; usado pelo orçamento de queries dos testes.
+listeners: list[Callable[[dict, RequestQueries], None]] = []
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Count statements and DB time into the current request; use ``async_engine.sync_engine`` for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = current_queries.get()
+        if queries is None:
+            return
+        queries.record_statement(statement)
+        context._profiler_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = current_queries.get()
+        started = getattr(context, "_profiler_started", None)
+        if queries is not None and started is not None:
+            queries.duration_ms += (time.perf_counter() - started) * 1000
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that scopes a :class:`RequestQueries` to each HTTP request.
+
+    Outside production the totals go out as a ``Server-Timing`` header. Statements
+    issued by a streaming body after the headers are sent are counted but not reported.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.sql_profiler_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope["method"], scope["path"])
+        token = current_queries.set(queries)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.env != "production":
+                MutableHeaders(scope=message).append("Server-Timing", queries.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_queries.reset(token)
+            for listener in listeners:
+                listener(scope, queries)
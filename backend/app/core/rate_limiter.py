@@ -1,19 +1,180 @@
-from collections import deque
-from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
 from fastapi import HTTPException, status
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.rate_limit_counter import RateLimitCounter
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitStore(Protocol):
+    def acquire(self, key: str, window: int, previous_weight: float, limit: int) -> bool:
+        """Count one hit for ``key`` in ``window`` if the sliding estimate allows it; rejected hits are not counted."""
+
+    def __len__(self) -> int: ...
+
+    def reset(self) -> None: ...
+
+
+class MemoryRateLimitStore:
+    """Per-process store: three integers per key, least-recently-hit order.
+
+    Idle keys are swept from the front in amortized O(1) and the oldest key is
+    dropped once ``max_keys`` is reached.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._keys: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sweep(self, current_window: int) -> None:
+        # Uma chave sem hits há dois ciclos tem estimativa zero e pode sair.
+        keys = self._keys
+        while keys:
+            oldest = next(iter(keys.values()))
+            if oldest[0] >= current_window - 1:
+                break
+            keys.popitem(last=False)
+
+    def acquire(self, key: str, window: int, previous_weight: float, limit: int) -> bool:
+        with self._lock:
+            self._sweep(window)
+            entry = self._keys.get(key)
+            if entry is None:
+                if len(self._keys) >= self.max_keys:
+                    self._keys.popitem(last=False)
+                entry = self._keys[key] = [window, 0, 0]
+            else:
+                self._keys.move_to_end(key)
+                if entry[0] != window:
+                    entry[2] = entry[1] if entry[0] == window - 1 else 0
+                    entry[1] = 0
+                    entry[0] = window
+
+            if entry[2] * previous_weight + entry[1] >= limit:
+                return False
+            entry[1] += 1
+            return True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+class DatabaseRateLimitStore:
+    """Store shared by every worker through the ``rate_limit_counters`` table.
+
+    Each hit is one atomic upsert (``INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING``), so concurrent workers only contend on the row of the same
+    key. A rejected hit is taken back in the same transaction, matching the
+    memory store. Old windows are deleted at most once
+    per window per process. On database errors the store fails open.
+    """
+
+    def __init__(self, bind: Engine) -> None:
+        self.bind = bind
+        self.table = RateLimitCounter.__table__
+        self._last_cleanup = 0
+
+    def acquire(self, key: str, window: int, previous_weight: float, limit: int) -> bool:
+        table = self.table
+        insert = pg_insert if self.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(table).values(key=key, window=window, hits=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key, table.c.window],
+            set_={"hits": table.c.hits + 1},
+        ).returning(table.c.hits)
+        try:
+            with self.bind.begin() as conn:
+                hits = conn.execute(stmt).scalar_one()
+                previous = conn.execute(
+                    select(table.c.hits).where(table.c.key == key, table.c.window == window - 1)
+                ).scalar() or 0
+                allowed = previous * previous_weight + hits - 1 < limit
+                if not allowed:
+                    # Hit recusado não conta na janela (mesma regra do store em memória).
+                    conn.execute(
+                        update(table).where(table.c.key == key, table.c.window == window).values(hits=table.c.hits - 1)
+                    )
+                if window > self._last_cleanup:
+                    self._last_cleanup = window
+                    conn.execute(delete(table).where(table.c.window < window - 1))
+        except Exception:
+            logger.warning("Rate limit store unavailable; allowing request", exc_info=True)
+            return True
+        return allowed
+
+    def __len__(self) -> int:
+        with self.bind.connect() as conn:
+            return conn.execute(select(func.count(func.distinct(self.table.c.key)))).scalar_one()
+
+    def reset(self) -> None:
+        with self.bind.begin() as conn:
+            conn.execute(delete(self.table))
+
+
+_shared_store: RateLimitStore | None = None
+
+
+def create_rate_limit_store(max_keys: int = 100_000) -> RateLimitStore:
+    """Store for a new limiter: the shared table when ``RATE_LIMIT_BACKEND=database``, otherwise in-process."""
+    global _shared_store
+    if settings.rate_limit_backend != "database":
+        return MemoryRateLimitStore(max_keys)
+    if _shared_store is None:
+        from app.db.session import engine
+
+        _shared_store = DatabaseRateLimitStore(engine)
+    return _shared_store
 
 
 class RateLimiter:
-    def __init__(self, max_requests: int, window_seconds: int) -> None:
+    """Sliding-window counter limiter: hits in the current window plus the previous window's hits weighted by overlap."""
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        max_keys: int = 100_000,
+        store: RateLimitStore | None = None,
+    ) -> None:
         self.max_requests = max_requests
-        self.window = timedelta(seconds=window_seconds)
-        self.requests: dict[str, deque[datetime]] = {}
+        self.window = window_seconds
+        self.store = store if store is not None else create_rate_limit_store(max_keys)
+        self.rejections = 0
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, now: float | None = None) -> bool:
+        # Relógio de parede: com store compartilhado, todos os workers precisam da mesma janela.
+        now = time.time() if now is None else now
+        window, offset = divmod(now, self.window)
+        allowed = self.store.acquire(key, int(window), 1 - offset / self.window, self.max_requests)
+        if not allowed:
+            with self._lock:
+                self.rejections += 1
+        return allowed
 
     def hit(self, key: str) -> None:
-        now = datetime.utcnow()
-        queue = self.requests.setdefault(key, deque())
-        while queue and (now - queue[0]) > self.window:
-            queue.popleft()
-        if len(queue) >= self.max_requests:
+        if not self.allow(key):
             raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
-        queue.append(now)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def reset(self) -> None:
+        self.store.reset()
+        with self._lock:
+            self.rejections = 0
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import tempfile
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.cloudinary import cloudinary_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def ping_database(bind: Engine) -> None:
+    with bind.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def touch_upload_dir(directory: str) -> None:
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".readyz-"):
+        pass
+
+
+class ReadinessProbe:
+    """Dependency checks refreshed by a background task; ``/readyz`` only reads the last result.
+
+    However often the orchestrator probes, the database sees one ``SELECT 1`` per
+    refresh interval per process. A result older than three intervals (refresh
+    task stuck or dead) counts as not ready.
+    """
+
+    def __init__(self, interval: float, timeout: float) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.cloudinary = cloudinary_client
+        self.checks: dict | None = None
+        self.checked_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run(self, name: str, check, critical: bool = True) -> tuple[str, dict]:
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(check(), self.timeout)
+            error = None if ok is not False else "unreachable"
+        except Exception as exc:
+            # /readyz é público: a resposta leva só o tipo do erro; a mensagem (host, porta) vai para o log.
+            logger.warning("Readiness check %s failed: %r", name, exc)
+            ok, error = False, type(exc).__name__
+        result = {"ok": ok is not False, "critical": critical, "durationMs": round((time.perf_counter() - started) * 1000, 1)}
+        if error:
+            result["error"] = error
+        return name, result
+
+    async def refresh(self, bind: Engine) -> dict:
+        checks = [
+            self._run("database", lambda: run_in_threadpool(ping_database, bind)),
+            self._run("uploads", lambda: run_in_threadpool(touch_upload_dir, settings.upload_dir)),
+        ]
+        if settings.cloudinary_cloud_name:
+            checks.append(self._run("cloudinary", lambda: self.cloudinary.reachable(self.timeout), critical=settings.readiness_require_cloudinary))
+        self.checks = dict(await asyncio.gather(*checks))
+        self.checked_at = time.monotonic()
+        return self.checks
+
+    def status(self) -> tuple[bool, dict]:
+        if self.checks is None:
+            return False, {"status": "starting"}
+        age = time.monotonic() - self.checked_at
+        ready = all(result["ok"] for result in self.checks.values() if result["critical"])
+        body = {"status": "ok" if ready else "unavailable", "checkedSecondsAgo": round(age, 1), "checks": self.checks}
+        if age > 3 * self.interval:
+            ready, body["status"] = False, "stale"
+        return ready, body
+
+    async def start(self, bind: Engine) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(bind))
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _loop(self, bind: Engine) -> None:
+        while True:
+            try:
+                await self.refresh(bind)
+            except Exception:
+                logger.exception("Readiness refresh failed")
+            await asyncio.sleep(self.interval)
+
+
+readiness_probe = ReadinessProbe(interval=settings.readiness_refresh_seconds, timeout=settings.readiness_check_timeout_seconds)
@@ -0,0 +1,40 @@
+import hashlib
+import io
+
+try:
+    from PIL import Image, UnidentifiedImageError
+except ImportError:  # Pillow é opcional (extra "images"); sem ele só há o hash de conteúdo.
+    Image = None
+
+HASH_SIZE = 8
+
+
+def difference_hash(pixels: list[list[int]]) -> str:
+    """64-bit dHash of a HASH_SIZE x (HASH_SIZE + 1) grayscale grid, as 16 hex chars.
+
+    Each bit says whether a pixel is brighter than its right neighbour, so
+    re-encoding, resizing or mild compression of the same picture keep the hash.
+    """
+    value = 0
+    for row in pixels:
+        for left, right in zip(row, row[1:]):
+            value = (value << 1) | (left > right)
+    return f"{value:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def perceptual_hash(data: bytes, content_type: str) -> str | None:
+    if Image is None or not content_type.startswith("image/"):
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+            values = list(small.getdata())
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    width = HASH_SIZE + 1
+    return difference_hash([values[row * width:(row + 1) * width] for row in range(HASH_SIZE)])
+
+
+def fingerprint_receipt(data: bytes, content_type: str) -> tuple[str, str | None]:
+    """Content hash (sha256) and, for decodable images, the perceptual hash."""
+    return hashlib.sha256(data).hexdigest(), perceptual_hash(data, content_type)
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.service import Service
+from app.schemas.service import ServiceBase
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class ServiceCatalog:
+    """Pre-serialized ``/api/services`` payload, reloaded on write or after a TTL.
+
+    Invalidation is per process; with several workers the TTL bounds how long
+    another worker may serve the previous catalog.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl = ttl_seconds
+        self._snapshot: CatalogSnapshot | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def cached(self) -> CatalogSnapshot | None:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.expires_at > time.monotonic():
+            return snapshot
+        return None
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snapshot = self.cached()
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            generation = self._generation
+        snapshot = self._load(db)
+        with self._lock:
+            # Uma invalidação durante a carga descarta o resultado (pode ser anterior à escrita).
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _load(self, db: Session) -> CatalogSnapshot:
+        services = [
+            ServiceBase(
+                id=service.id,
+                name=service.name,
+                type=service.type,
+                price=service.price,
+                commissionRate=service.commission_rate,
+                active=service.active,
+                description=service.description,
+            )
+            for service in db.scalars(select(Service).order_by(Service.id))
+        ]
+        body = json.dumps([service.model_dump() for service in services], ensure_ascii=False, separators=(",", ":")).encode()
+        return CatalogSnapshot(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+
+service_catalog = ServiceCatalog(ttl_seconds=settings.service_catalog_ttl_seconds)
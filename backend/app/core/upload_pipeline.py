@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.cloudinary import cloudinary_client
+from app.core.config import settings
+from app.models.appointment import Appointment
+from app.models.media_upload import MediaUpload
+from app.models.receipt_proof import ReceiptProof
+
+logger = logging.getLogger(__name__)
+
+
+def upload_folder(upload_type: str, shop_id: int, user_id: str) -> str:
+    if upload_type == "profile":
+        return f"salons/{shop_id}/professionals/{user_id}/profile"
+    return f"salons/{shop_id}/payments/{user_id}/receipts"
+
+
+def local_upload_url(local_path: str) -> str:
+    return "/uploads/" + Path(local_path).relative_to(settings.upload_dir).as_posix()
+
+
+@dataclass(frozen=True)
+class UploadJob:
+    media_id: int
+    local_path: str
+    local_url: str
+    content_type: str
+    folder: str
+    bind: Engine
+
+
+class UploadPipeline:
+    """Pushes locally stored receipts to Cloudinary from a pool of asyncio workers.
+
+    Jobs submitted before ``start()`` (or after ``stop()``) wait in a backlog
+    and are picked up on the next start. Each job claims its ``media_uploads``
+    row (pending -> processing) so a row is only uploaded once.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cloudinary = cloudinary_client
+        self.backlog: list[UploadJob] = []
+        self._queue: asyncio.Queue[UploadJob] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(self, job: UploadJob) -> bool:
+        """Queue a job; returns False when the queue is full."""
+        if not self.running:
+            self.backlog.append(job)
+            return True
+        if self._queue.qsize() >= self.queue_size:
+            return False
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return True
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        backlog, self.backlog = self.backlog, []
+        for job in backlog:
+            self._queue.put_nowait(job)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued jobs (up to ``timeout``) and stop the workers."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Upload pipeline stopped with %s jobs pending", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            self.backlog.append(self._queue.get_nowait())
+        self._tasks = []
+        self._queue = None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.process(job)
+            except Exception:
+                logger.exception("Upload job %s failed unexpectedly", job.media_id)
+            finally:
+                self._queue.task_done()
+
+    async def run_backlog(self) -> None:
+        backlog, self.backlog = self.backlog, []
+        for job in backlog:
+            await self.process(job)
+
+    async def process(self, job: UploadJob) -> None:
+        if not await run_in_threadpool(self._claim, job):
+            return
+        try:
+            data = await run_in_threadpool(Path(job.local_path).read_bytes)
+            result = await self.cloudinary.upload(data, job.content_type, job.folder)
+        except Exception as exc:
+            logger.warning("Upload job %s failed: %s", job.media_id, exc)
+            await run_in_threadpool(self._fail, job, str(getattr(exc, "detail", exc)))
+            return
+        await run_in_threadpool(self._complete, job, result)
+
+    def _claim(self, job: UploadJob) -> bool:
+        with Session(bind=job.bind) as db:
+            claimed = db.execute(
+                update(MediaUpload)
+                .where(MediaUpload.id == job.media_id, MediaUpload.status == "pending")
+                .values(status="processing", claimed_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+        return claimed == 1
+
+    def _fail(self, job: UploadJob, error: str) -> None:
+        with Session(bind=job.bind) as db:
+            db.execute(update(MediaUpload).where(MediaUpload.id == job.media_id).values(status="failed", error=error[:500]))
+            db.commit()
+
+    def _complete(self, job: UploadJob, result: dict) -> None:
+        with Session(bind=job.bind) as db:
+            db.execute(
+                update(MediaUpload)
+                .where(MediaUpload.id == job.media_id)
+                .values(
+                    status="done",
+                    secure_url=result["secure_url"],
+                    public_id=result["public_id"],
+                    asset_id=result["asset_id"],
+                    error=None,
+                )
+            )
+            proof_hash = db.scalar(
+                update(ReceiptProof)
+                .where(ReceiptProof.media_id == job.media_id)
+                .values(secure_url=result["secure_url"])
+                .returning(ReceiptProof.sha256)
+            )
+            if proof_hash is not None:
+                # Atendimentos registrados com a cópia local passam a apontar para a nuvem.
+                # proof_hash é indexado (ix_appointments_proof_hash); proof_url só confirma que a linha cita a cópia local.
+                db.execute(
+                    update(Appointment)
+                    .where(Appointment.proof_hash == proof_hash, Appointment.proof_url == job.local_url)
+                    .values(proof_url=result["secure_url"])
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+
+
+def media_upload_job(media: MediaUpload, bind: Engine) -> UploadJob:
+    return UploadJob(
+        media_id=media.id,
+        local_path=media.local_path,
+        local_url=local_upload_url(media.local_path),
+        content_type=media.content_type or "application/octet-stream",
+        folder=upload_folder(media.type, media.shop_id, media.professional_id),
+        bind=bind,
+    )
+
+
+def recover_pending_uploads(bind: Engine) -> int:
+    """Re-submit rows left pending, or stuck in processing, by a previous process (files are already on disk)."""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.upload_processing_stale_seconds)
+    with Session(bind=bind) as db:
+        # "processing" antigo: o worker que reivindicou a linha morreu antes de concluir ou falhar.
+        db.execute(
+            update(MediaUpload)
+            .where(
+                MediaUpload.status == "processing",
+                or_(MediaUpload.claimed_at.is_(None), MediaUpload.claimed_at < stale_before),
+            )
+            .values(status="pending", claimed_at=None)
+        )
+        db.commit()
+        rows = db.execute(select(MediaUpload).where(MediaUpload.status == "pending")).scalars().all()
+        for media in rows:
+            upload_pipeline.submit(media_upload_job(media, bind))
+    return len(rows)
+
+
+upload_pipeline = UploadPipeline(workers=settings.upload_workers, queue_size=settings.upload_queue_size)
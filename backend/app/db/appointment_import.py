@@ -0,0 +1,109 @@
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.rollups import record_appointments_created
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.schemas.appointment import AppointmentBatchResult, AppointmentImportError, AppointmentImportRow
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+def chunked(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'linha'}: {error['msg']}" for error in exc.errors())
+
+
+def import_appointments(
+    db: Session,
+    professional_id: str,
+    shop_id: int | None,
+    rows: Iterable[dict],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> AppointmentBatchResult:
+    """Validate and insert appointments in chunked transactions, collecting per-row errors.
+
+    Each chunk costs one service query, one transaction_id query, one
+    executemany insert and one rollup upsert, then commits; a bad row never
+    aborts its neighbours. Rows are numbered from 1 in input order.
+    """
+    result = AppointmentBatchResult(created=0, errors=[])
+    commission_rates: dict[int, int] = {}
+    seen_transactions: set[str] = set()
+    row_number = 0
+
+    for chunk in chunked(rows, chunk_size):
+        parsed: list[tuple[int, AppointmentImportRow]] = []
+        for raw in chunk:
+            row_number += 1
+            try:
+                row = AppointmentImportRow.model_validate(raw)
+            except ValidationError as exc:
+                result.errors.append(AppointmentImportError(row=row_number, message=validation_message(exc)))
+                continue
+            if row.paymentMethod in {"pix", "card"} and not row.proofUrl:
+                result.errors.append(AppointmentImportError(row=row_number, message="Comprovante obrigatório para pagamentos digitais"))
+                continue
+            parsed.append((row_number, row))
+
+        missing_services = {row.serviceId for _, row in parsed} - commission_rates.keys()
+        if missing_services:
+            commission_rates.update(db.execute(select(Service.id, Service.commission_rate).where(Service.id.in_(missing_services))).all())
+        transaction_ids = {row.transactionId for _, row in parsed if row.transactionId}
+        taken = set(db.scalars(select(Appointment.transaction_id).where(Appointment.transaction_id.in_(transaction_ids)))) if transaction_ids else set()
+
+        now = datetime.utcnow()
+        values: list[dict] = []
+        numbers: list[int] = []
+        for number, row in parsed:
+            if row.serviceId not in commission_rates:
+                result.errors.append(AppointmentImportError(row=number, message="Service not found"))
+                continue
+            if row.transactionId and (row.transactionId in taken or row.transactionId in seen_transactions):
+                result.errors.append(AppointmentImportError(row=number, message="Transação já registrada"))
+                continue
+            if row.transactionId:
+                seen_transactions.add(row.transactionId)
+            values.append(
+                {
+                    "professional_id": professional_id,
+                    "service_id": row.serviceId,
+                    "date": row.date or now,
+                    "customer_name": row.customerName,
+                    "price": row.price,
+                    "commission_rate": commission_rates[row.serviceId],
+                    "payment_method": row.paymentMethod,
+                    "transaction_id": row.transactionId,
+                    "proof_url": row.proofUrl,
+                    "status": "pending",
+                    "possible_duplicate": False,
+                }
+            )
+            numbers.append(number)
+
+        if not values:
+            continue
+        try:
+            db.execute(insert(Appointment), values)
+            record_appointments_created(db, values, shop_id)
+            db.commit()
+        except IntegrityError:
+            # Outra gravação concorrente tomou algum transaction_id deste lote; o lote inteiro é descartado.
+            db.rollback()
+            result.errors.extend(AppointmentImportError(row=number, message="Conflito ao gravar o lote") for number in numbers)
+            continue
+        result.created += len(values)
+
+    result.errors.sort(key=lambda error: error.row)
+    return result
@@ -0,0 +1,59 @@
+import unicodedata
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.appointment import DUPLICATE_BUCKET_SECONDS, Appointment, time_bucket
+
+DUPLICATE_WINDOW = timedelta(seconds=DUPLICATE_BUCKET_SECONDS)
+NAME_SIMILARITY = 0.8
+MAX_CANDIDATES = 50
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().split())
+
+
+def similar_names(left: str, right: str) -> bool:
+    """Same client typed twice: equal after normalisation, one contained in the other, or a close typo."""
+    a, b = normalize_name(left), normalize_name(right)
+    if a == b:
+        return True
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if tokens_a and tokens_b and (tokens_a <= tokens_b or tokens_b <= tokens_a):
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= NAME_SIMILARITY
+
+
+def find_near_duplicate(
+    db: Session,
+    professional_id: str,
+    when: datetime,
+    price: int,
+    payment_method: str,
+    customer_name: str,
+) -> int | None:
+    """Id of an appointment that looks like the same sale registered again, if any.
+
+    Reads only the three time buckets around ``when`` through
+    ``ix_appointments_duplicate_bucket``; names are compared in Python on the
+    handful of candidates left.
+    """
+    bucket = time_bucket(when)
+    candidates = db.execute(
+        select(Appointment.id, Appointment.date, Appointment.customer_name)
+        .where(
+            Appointment.professional_id == professional_id,
+            Appointment.time_bucket.in_((bucket - 1, bucket, bucket + 1)),
+            Appointment.price == price,
+            Appointment.payment_method == payment_method,
+        )
+        .limit(MAX_CANDIDATES)
+    ).all()
+    for appointment_id, date, name in candidates:
+        if abs(date - when) <= DUPLICATE_WINDOW and similar_names(name, customer_name):
+            return appointment_id
+    return None
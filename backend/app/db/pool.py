@@ -0,0 +1,142 @@
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+
+# Limites (ms) do histograma de espera por conexão; o último balde é +Inf.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class PoolStats:
+    """Checkout wait-time histogram, timeouts and pre-ping invalidations for one pool."""
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_sum_ms = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidated = 0
+        self._lock = threading.Lock()
+
+    def observe(self, wait_ms: float) -> None:
+        with self._lock:
+            self.buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.wait_sum_ms += wait_ms
+            self.checkouts += 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def invalidation(self) -> None:
+        with self._lock:
+            self.invalidated += 1
+
+    def histogram(self) -> dict:
+        with self._lock:
+            buckets, total, count = list(self.buckets), self.wait_sum_ms, self.checkouts
+        cumulative, running = {}, 0
+        for bound, hits in zip((*map(str, WAIT_BUCKETS_MS), "+Inf"), buckets):
+            running += hits
+            cumulative[bound] = running
+        return {"buckets": cumulative, "sumMs": round(total, 3), "count": count}
+
+
+pool_stats: dict[str, PoolStats] = {}
+
+
+class _TimedPool:
+    stats: PoolStats
+
+    def _do_get(self):
+        # _do_get é onde a QueuePool espera por uma conexão livre (até pool_timeout).
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timed_out()
+            raise
+        self.stats.observe((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def timed_pool_class(base: type[Pool], stats: PoolStats) -> type[Pool]:
+    # Atributo de classe: Pool.recreate() (engine.dispose) instancia a mesma classe e mantém as métricas.
+    return type(f"Timed{base.__name__}", (_TimedPool, base), {"stats": stats})
+
+
+def _in_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def pool_options(url: str, name: str, *, is_async: bool = False) -> dict:
+    """``create_engine`` keyword arguments for the configured pool, registering its stats under ``name``."""
+    options: dict = {"pool_pre_ping": settings.db_pool_pre_ping == "always"}
+    if _in_memory_sqlite(url):
+        # SQLite em memória usa SingletonThreadPool/StaticPool, que não têm tamanho nem overflow.
+        return options
+    stats = pool_stats.setdefault(name, PoolStats())
+    options.update(
+        poolclass=timed_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, stats),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+    return options
+
+
+def install_pool_listeners(engine: Engine, name: str) -> None:
+    """Idle pre-ping and invalidation counting; call with ``async_engine.sync_engine`` for async engines."""
+    stats = pool_stats.get(name)
+    if stats is not None:
+        event.listen(engine, "invalidate", lambda dbapi_connection, record, error: stats.invalidation())
+    if settings.db_pool_pre_ping != "idle":
+        return
+
+    idle_seconds = settings.db_pool_pre_ping_idle_seconds
+
+    @event.listens_for(engine, "connect")
+    def mark_fresh(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def mark_checkin(dbapi_connection, record):
+        if record is not None:
+            record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def ping_if_idle(dbapi_connection, record, proxy):
+        # Só paga o SELECT 1 quem ficou parado no pool; conexões quentes seguem direto.
+        if time.monotonic() - record.info.get("checked_in_at", 0.0) < idle_seconds:
+            return
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as error:
+            # DisconnectionError faz o pool descartar a conexão e abrir outra na mesma tentativa.
+            raise exc.DisconnectionError("conexão ociosa não respondeu ao ping") from error
+        record.info["checked_in_at"] = time.monotonic()
+
+
+def pool_status(name: str, pool: Pool) -> dict:
+    """Current occupancy of ``pool`` plus the recorded stats, as served by ``/internal/pool``."""
+    status: dict = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checkedIn=pool.checkedin(),
+            checkedOut=pool.checkedout(),
+            # QueuePool.overflow() começa em -size; só o que passa de zero está acima do pool_size.
+            overflow=max(pool.overflow(), 0),
+            maxOverflow=settings.db_max_overflow,
+            timeoutSeconds=pool.timeout(),
+        )
+    stats = pool_stats.get(name)
+    if stats is not None:
+        status.update(waitMs=stats.histogram(), timeouts=stats.timeouts, invalidated=stats.invalidated)
+    return status
@@ -0,0 +1,25 @@
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.receipt_proof import ReceiptProof
+
+# Limita quantos arquivos distintos com o mesmo hash perceptual entram na checagem.
+MAX_SIMILAR_PROOFS = 50
+
+
+def find_receipt_proof(db: Session, url: str) -> ReceiptProof | None:
+    """Resolve a proof URL (local copy or Cloudinary) to its fingerprint row."""
+    return db.scalar(select(ReceiptProof).where(or_(ReceiptProof.local_url == url, ReceiptProof.secure_url == url)).limit(1))
+
+
+def proof_already_used(db: Session, proof: ReceiptProof) -> bool:
+    """True when an appointment already cites this file or a perceptually identical one."""
+    hashes = [proof.sha256]
+    if proof.perceptual_hash:
+        hashes += db.scalars(
+            select(ReceiptProof.sha256)
+            .where(ReceiptProof.perceptual_hash == proof.perceptual_hash, ReceiptProof.sha256 != proof.sha256)
+            .limit(MAX_SIMILAR_PROOFS)
+        ).all()
+    return db.scalar(select(Appointment.id).where(Appointment.proof_hash.in_(hashes)).limit(1)) is not None
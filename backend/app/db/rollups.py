@@ -0,0 +1,117 @@
+from sqlalchemy import Date, case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.appointment_daily_rollup import AppointmentDailyRollup
+from app.models.profile import Profile
+
+COUNTERS = ("cuts", "confirmed_revenue", "gross_commission", "pending_count")
+
+
+def contribution(price: int, commission_rate: int, status: str) -> dict[str, int]:
+    """Counters a single appointment adds to its professional's daily rollup."""
+    confirmed = status == "confirmed"
+    return {
+        "cuts": 1,
+        "confirmed_revenue": price if confirmed else 0,
+        "gross_commission": price * commission_rate // 100 if confirmed else 0,
+        "pending_count": 1 if status == "pending" else 0,
+    }
+
+
+def apply_rollup_delta(db: Session, appointment: Appointment, delta: dict[str, int], shop_id: int | None = None) -> None:
+    """Atomically add ``delta`` to the appointment's (professional, day) row inside the caller's transaction."""
+    if not any(delta.values()):
+        return
+    if shop_id is None:
+        shop_id = db.query(Profile.shop_id).filter(Profile.user_id == appointment.professional_id).scalar()
+
+    upsert_rollups(
+        db,
+        [{"shop_id": shop_id, "professional_id": appointment.professional_id, "day": appointment.date.date(), **delta}],
+    )
+
+
+def upsert_rollups(db: Session, rows: list[dict]) -> None:
+    """Add each row's counters to its (professional, day) rollup in one executemany upsert."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    table = AppointmentDailyRollup.__table__
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.professional_id, table.c.day],
+        set_={"shop_id": stmt.excluded.shop_id, **{name: table.c[name] + stmt.excluded[name] for name in COUNTERS}},
+    )
+    db.execute(stmt, rows)
+
+
+def record_appointment_created(db: Session, appointment: Appointment, shop_id: int | None = None) -> None:
+    delta = contribution(appointment.price, appointment.commission_rate, appointment.status)
+    apply_rollup_delta(db, appointment, delta, shop_id)
+
+
+def record_appointments_created(db: Session, rows: list[dict], shop_id: int | None) -> None:
+    """Rollup counterpart of a bulk insert: one delta per (professional, day), not per appointment."""
+    totals: dict[tuple[str, object], dict[str, int]] = {}
+    for row in rows:
+        delta = contribution(row["price"], row["commission_rate"], row["status"])
+        bucket = totals.setdefault((row["professional_id"], row["date"].date()), dict.fromkeys(COUNTERS, 0))
+        for name in COUNTERS:
+            bucket[name] += delta[name]
+    if totals:
+        upsert_rollups(
+            db,
+            [{"shop_id": shop_id, "professional_id": professional_id, "day": day, **delta} for (professional_id, day), delta in totals.items()],
+        )
+
+
+def record_status_change(db: Session, appointment: Appointment, previous_status: str, new_status: str, shop_id: int | None = None) -> None:
+    """Rollup delta of one transition; call it only when the caller's UPDATE actually changed the row."""
+    before = contribution(appointment.price, appointment.commission_rate, previous_status)
+    after = contribution(appointment.price, appointment.commission_rate, new_status)
+    apply_rollup_delta(db, appointment, {name: after[name] - before[name] for name in COUNTERS}, shop_id)
+
+
+def record_status_changes(db: Session, changes: list[tuple[Appointment, str]], shop_id: int | None) -> None:
+    """Bulk counterpart of ``record_status_change`` for (appointment still holding its old status, new status) pairs."""
+    totals: dict[tuple[str, object], dict[str, int]] = {}
+    for appointment, new_status in changes:
+        before = contribution(appointment.price, appointment.commission_rate, appointment.status)
+        after = contribution(appointment.price, appointment.commission_rate, new_status)
+        bucket = totals.setdefault((appointment.professional_id, appointment.date.date()), dict.fromkeys(COUNTERS, 0))
+        for name in COUNTERS:
+            bucket[name] += after[name] - before[name]
+    rows = [
+        {"shop_id": shop_id, "professional_id": professional_id, "day": day, **delta}
+        for (professional_id, day), delta in totals.items()
+        if any(delta.values())
+    ]
+    if rows:
+        upsert_rollups(db, rows)
+
+
+def rebuild_daily_rollups(db: Session) -> int:
+    """Recompute every rollup row from ``appointments`` (backfill / repair). Returns the number of rows written."""
+    confirmed = Appointment.status == "confirmed"
+    day = func.date(Appointment.date, type_=Date)
+    source = (
+        select(
+            Profile.shop_id,
+            Appointment.professional_id,
+            day,
+            func.count(Appointment.id),
+            func.coalesce(func.sum(case((confirmed, Appointment.price), else_=0)), 0),
+            func.coalesce(func.sum(case((confirmed, (Appointment.price * Appointment.commission_rate) // 100), else_=0)), 0),
+            func.coalesce(func.sum(case((Appointment.status == "pending", 1), else_=0)), 0),
+        )
+        .outerjoin(Profile, Profile.user_id == Appointment.professional_id)
+        .group_by(Profile.shop_id, Appointment.professional_id, day)
+    )
+    table = AppointmentDailyRollup.__table__
+    db.execute(delete(table))
+    result = db.execute(
+        table.insert().from_select(["shop_id", "professional_id", "day", *COUNTERS], source)
+    )
+    db.commit()
+    return result.rowcount
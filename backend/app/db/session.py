@@ -1,7 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.query_profiler import install_query_profiler
+from app.db.pool import install_pool_listeners, pool_options
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+
+def async_database_url(url: str) -> str:
+    """Same database through an asyncio driver (psycopg already speaks async; SQLite needs aiosqlite)."""
+    for prefix in ("sqlite+pysqlite://", "sqlite://"):
+        if url.startswith(prefix):
+            return "sqlite+aiosqlite://" + url[len(prefix) :]
+    return url
+
+
+engine = create_engine(settings.database_url, **pool_options(settings.database_url, "sync"))
+install_pool_listeners(engine, "sync")
+install_query_profiler(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Endpoints de leitura quentes rodam no event loop, sem ocupar uma thread por consulta.
+async_engine = create_async_engine(
+    async_database_url(settings.database_url), **pool_options(async_database_url(settings.database_url), "async", is_async=True)
+)
+install_pool_listeners(async_engine.sync_engine, "async")
+install_query_profiler(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
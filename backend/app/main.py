@@ -1,13 +1,21 @@
 import logging
 import os
 from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 
+from app.core.audit import audit_writer
 from app.core.config import settings
 from app.core.security import get_password_hash
-from app.db.session import SessionLocal
+from app.core.password_hashing import password_hasher
+from app.core.metrics import MetricsMiddleware
+from app.core.query_profiler import QueryProfilerMiddleware
+from app.core.readiness import readiness_probe
+from app.core.cloudinary import cloudinary_client
+from app.core.upload_pipeline import recover_pending_uploads, upload_pipeline
+from app.db.session import SessionLocal, engine
 from app.models.user import User
 from app.models.profile import Profile
 from app.models.shop import Shop
@@ -17,6 +25,8 @@ from app.api.services import router as services_router
 from app.api.appointments import router as appointments_router
 from app.api.stats import router as stats_router
 from app.api.uploads import router as uploads_router
+from app.api.audit import router as audit_router
+from app.api.internal import router as internal_router
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +39,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_router)
 app.include_router(profile_router)
@@ -37,6 +50,8 @@ app.include_router(services_router)
 app.include_router(appointments_router)
 app.include_router(stats_router)
 app.include_router(uploads_router)
+app.include_router(audit_router)
+app.include_router(internal_router)
 
 os.makedirs(settings.upload_dir, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
@@ -140,11 +155,71 @@ def ensure_seed_data():
         db.close()
 
 
+@app.on_event("startup")
+def start_audit_writer():
+    audit_writer.start(engine)
+
+
+@app.on_event("startup")
+async def start_cloudinary_client():
+    await cloudinary_client.start()
+
+
+@app.on_event("startup")
+async def start_upload_pipeline():
+    await upload_pipeline.start()
+    try:
+        recovered = recover_pending_uploads(engine)
+    except Exception:
+        logger.exception("Could not recover pending uploads at startup.")
+    else:
+        if recovered:
+            logger.info("Re-queued %s pending uploads", recovered)
+
+
+@app.on_event("startup")
+async def start_readiness_probe():
+    await readiness_probe.start(engine)
+
+
+@app.on_event("shutdown")
+async def stop_readiness_probe():
+    await readiness_probe.stop()
+
+
+@app.on_event("shutdown")
+async def stop_upload_pipeline():
+    await upload_pipeline.stop()
+
+
+@app.on_event("shutdown")
+async def stop_cloudinary_client():
+    await cloudinary_client.aclose()
+
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_audit_writer():
+    audit_writer.stop()
+
+
 @app.get("/healthz")
 def healthz():
+    # Liveness: só confirma que o processo responde; dependências ficam no /readyz.
     return {"status": "ok"}
 
 
+@app.get("/readyz")
+def readyz():
+    # Lê o resultado da última checagem em segundo plano; a sonda nunca toca o banco.
+    ready, body = readiness_probe.status()
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
 @app.get("/api/health")
 def api_health():
     return {"status": "ok"}
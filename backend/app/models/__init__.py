@@ -6,6 +6,9 @@ from app.models.appointment import Appointment
 from app.models.audit_log import AuditLog
 from app.models.professional_approval import ProfessionalApproval
 from app.models.media_upload import MediaUpload
+from app.models.appointment_daily_rollup import AppointmentDailyRollup
+from app.models.rate_limit_counter import RateLimitCounter
+from app.models.receipt_proof import ReceiptProof
 
 __all__ = [
     "User",
@@ -16,4 +19,7 @@ __all__ = [
     "AuditLog",
     "ProfessionalApproval",
     "MediaUpload",
+    "AppointmentDailyRollup",
+    "RateLimitCounter",
+    "ReceiptProof",
 ]
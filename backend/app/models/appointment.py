@@ -1,16 +1,27 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import String, Integer, BigInteger, DateTime, ForeignKey, Boolean, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
 from app.db.base import Base
 
+# Janela do detector de quase-duplicatas; cada atendimento guarda o balde de tempo em que caiu.
+DUPLICATE_BUCKET_SECONDS = 600
+
+
+def time_bucket(value: datetime) -> int:
+    return int((value - datetime(1970, 1, 1)).total_seconds()) // DUPLICATE_BUCKET_SECONDS
+
+
+def default_time_bucket(context) -> int:
+    return time_bucket(context.get_current_parameters()["date"])
+
 
 class Appointment(Base):
     __tablename__ = "appointments"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    professional_id: Mapped[str] = mapped_column(PGUUID(as_uuid=False), ForeignKey("users.id"), index=True)
+    professional_id: Mapped[str] = mapped_column(PGUUID(as_uuid=False), ForeignKey("users.id"))
     service_id: Mapped[int] = mapped_column(Integer, ForeignKey("services.id"))
     date: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     customer_name: Mapped[str] = mapped_column(String)
@@ -22,6 +33,27 @@ class Appointment(Base):
     proof_hash: Mapped[str | None] = mapped_column(String)
     status: Mapped[str] = mapped_column(String, default="pending")
     possible_duplicate: Mapped[bool] = mapped_column(Boolean, default=False)
+    time_bucket: Mapped[int | None] = mapped_column(BigInteger, default=default_time_bucket)
 
     professional = relationship("User")
     service = relationship("Service")
+
+
+# Índices dos caminhos quentes: listagem por profissional/período, listagem geral paginada e fila de pendentes.
+Index("ix_appointments_professional_id_date", Appointment.professional_id, Appointment.date.desc())
+Index("ix_appointments_date_id", Appointment.date.desc(), Appointment.id.desc())
+Index("ix_appointments_status_date", Appointment.status, Appointment.date)
+Index(
+    "ix_appointments_pending_date",
+    Appointment.date,
+    postgresql_where=text("status = 'pending'"),
+    sqlite_where=text("status = 'pending'"),
+)
+Index("ix_appointments_proof_hash", Appointment.proof_hash)
+Index(
+    "ix_appointments_duplicate_bucket",
+    Appointment.professional_id,
+    Appointment.time_bucket,
+    Appointment.price,
+    Appointment.payment_method,
+)
@@ -0,0 +1,23 @@
+from datetime import date
+from sqlalchemy import Integer, Date, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from app.db.base import Base
+
+
+class AppointmentDailyRollup(Base):
+    __tablename__ = "appointment_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("professional_id", "day", name="uq_appointment_daily_rollups_professional_day"),
+        Index("ix_appointment_daily_rollups_shop_id_day", "shop_id", "day"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    shop_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("shops.id"))
+    professional_id: Mapped[str] = mapped_column(PGUUID(as_uuid=False), ForeignKey("users.id"))
+    day: Mapped[date] = mapped_column(Date)
+    cuts: Mapped[int] = mapped_column(Integer, default=0)
+    confirmed_revenue: Mapped[int] = mapped_column(Integer, default=0)
+    gross_commission: Mapped[int] = mapped_column(Integer, default=0)
+    pending_count: Mapped[int] = mapped_column(Integer, default=0)
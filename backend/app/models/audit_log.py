@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
@@ -11,7 +11,12 @@ class AuditLog(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     actor_id: Mapped[str] = mapped_column(PGUUID(as_uuid=False), ForeignKey("users.id"))
+    shop_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("shops.id"))
     appointment_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("appointments.id"))
     action: Mapped[str] = mapped_column(String)
     metadata_json: Mapped[str | None] = mapped_column("metadata", Text)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+# Consulta do audit log por loja, paginada por (created_at, id).
+Index("ix_audit_logs_shop_id_created_at", AuditLog.shop_id, AuditLog.created_at.desc(), AuditLog.id.desc())
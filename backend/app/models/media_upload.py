@@ -14,7 +14,13 @@ class MediaUpload(Base):
     shop_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("shops.id"), index=True)
     professional_id: Mapped[str | None] = mapped_column(PGUUID(as_uuid=False), ForeignKey("users.id"), index=True)
     payment_id: Mapped[int | None] = mapped_column(Integer)
-    secure_url: Mapped[str] = mapped_column(Text)
-    public_id: Mapped[str] = mapped_column(Text)
-    asset_id: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String(16), default="done")
+    local_path: Mapped[str | None] = mapped_column(Text)
+    content_type: Mapped[str | None] = mapped_column(String)
+    secure_url: Mapped[str | None] = mapped_column(Text)
+    public_id: Mapped[str | None] = mapped_column(Text)
+    asset_id: Mapped[str | None] = mapped_column(Text)
+    error: Mapped[str | None] = mapped_column(Text)
+    # Quando um worker passou a linha para "processing"; linhas paradas há muito tempo são retomadas.
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
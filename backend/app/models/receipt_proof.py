@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ReceiptProof(Base):
+    """One row per distinct receipt file, keyed by its content hash."""
+
+    __tablename__ = "receipt_proofs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    sha256: Mapped[str] = mapped_column(String(64), unique=True)
+    perceptual_hash: Mapped[str | None] = mapped_column(String(16), index=True)
+    media_id: Mapped[int] = mapped_column(Integer, ForeignKey("media_uploads.id"))
+    local_url: Mapped[str] = mapped_column(String, unique=True)
+    secure_url: Mapped[str | None] = mapped_column(String, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Literal
 from pydantic import BaseModel, ConfigDict, field_validator
 
@@ -44,6 +44,42 @@ class AppointmentCreate(BaseModel):
         return value
 
 
+class AppointmentImportRow(AppointmentCreate):
+    date: datetime | None = None
+
+    @field_validator("date")
+    @classmethod
+    def naive_utc(cls, value: datetime | None) -> datetime | None:
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class AppointmentImportError(BaseModel):
+    row: int
+    message: str
+
+
+class AppointmentBatchResult(BaseModel):
+    created: int
+    errors: list[AppointmentImportError]
+
+
 class AppointmentStatusUpdate(BaseModel):
     status: Literal["pending", "confirmed", "rejected"]
     reason: str | None = None
+
+
+class AppointmentReviewItem(BaseModel):
+    id: int
+    status: Literal["pending", "confirmed", "rejected"]
+    reason: str | None = None
+
+
+class AppointmentBulkReview(BaseModel):
+    items: list[AppointmentReviewItem]
+
+
+class AppointmentBulkReviewResult(BaseModel):
+    appointments: list[AppointmentBase]
+    notFound: list[int]
@@ -0,0 +1,11 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class AuditEntry(BaseModel):
+    id: int
+    actorId: str
+    action: str
+    appointmentId: int | None = None
+    metadata: dict | None = None
+    createdAt: datetime
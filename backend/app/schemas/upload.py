@@ -19,3 +19,13 @@ class CloudinaryUploadRequest(BaseModel):
     dataBase64: str
     paymentId: int | None = None
     appointmentId: int | None = None
+
+
+class UploadJobStatus(BaseModel):
+    jobId: int
+    type: Literal["profile", "receipt"]
+    status: Literal["pending", "processing", "done", "failed"]
+    secure_url: str | None = None
+    public_id: str | None = None
+    asset_id: str | None = None
+    error: str | None = None
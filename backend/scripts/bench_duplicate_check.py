@@ -0,0 +1,94 @@
+"""Latência da checagem de quase-duplicatas com milhões de atendimentos gravados.
+
+Popula um SQLite temporário com o schema da aplicação e mede find_near_duplicate
+(balde de tempo + índice ix_appointments_duplicate_bucket).
+Uso (a partir de backend/): python -m scripts.bench_duplicate_check [--rows 2000000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.duplicates import find_near_duplicate
+from app.models import Appointment
+from app.models.appointment import time_bucket
+
+PROFESSIONALS = 500
+BATCH = 50_000
+START = datetime(2023, 1, 1)
+SPAN_SECONDS = 3 * 365 * 24 * 3600
+PRICES = [3000, 3500, 4000, 4500, 5000, 6000, 8000]
+METHODS = ["cash", "pix", "card"]
+NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Elisa", "Fábio", "Gustavo", "Helena", "Igor", "Júlia"]
+
+
+def populate(engine, rows: int, rng: random.Random) -> None:
+    table = Appointment.__table__
+    with engine.begin() as conn:
+        for offset in range(0, rows, BATCH):
+            batch = []
+            for _ in range(min(BATCH, rows - offset)):
+                date = START + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+                batch.append(
+                    {
+                        "professional_id": f"prof-{rng.randrange(PROFESSIONALS)}",
+                        "service_id": 1,
+                        "date": date,
+                        "time_bucket": time_bucket(date),
+                        "customer_name": f"{rng.choice(NAMES)} {rng.randrange(1000)}",
+                        "price": rng.choice(PRICES),
+                        "commission_rate": 40,
+                        "payment_method": rng.choice(METHODS),
+                        "status": "confirmed",
+                        "possible_duplicate": False,
+                    }
+                )
+            conn.execute(insert(table), batch)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--probes", type=int, default=5_000)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        populate(engine, args.rows, rng)
+        print(f"{args.rows:,} atendimentos gravados em {time.perf_counter() - started:.1f}s")
+
+        probes = [
+            (f"prof-{rng.randrange(PROFESSIONALS)}", START + timedelta(seconds=rng.randrange(SPAN_SECONDS)), rng.choice(PRICES), rng.choice(METHODS), f"{rng.choice(NAMES)} {rng.randrange(1000)}")
+            for _ in range(args.probes)
+        ]
+        latencies = []
+        hits = 0
+        with Session(engine) as db:
+            for probe in probes[:100]:
+                find_near_duplicate(db, *probe)
+            for probe in probes:
+                started = time.perf_counter()
+                hits += find_near_duplicate(db, *probe) is not None
+                latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"checagem: p50 {statistics.median(latencies):.3f} ms   p99 {p99:.3f} ms   ({hits} suspeitas em {len(probes)} consultas)")
+        engine.dispose()
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
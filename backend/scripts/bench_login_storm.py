@@ -0,0 +1,121 @@
+"""Latência de GET /api/appointments durante uma rajada de logins.
+
+Sobe o uvicorn com SQLite local para cada configuração do pool de bcrypt e
+mede p50/p99 das listagens enquanto ``--logins`` logins concorrentes rodam. Todos os
+logins saem de 127.0.0.1, então o rate limiter de login é desligado no servidor do
+benchmark: senão quase todos voltariam 429 sem chegar ao bcrypt.
+
+Uso (a partir de backend/): python -m scripts.bench_login_storm [--logins 200] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+CONFIGS = {
+    "inline (antes)": {"PASSWORD_HASH_WORKERS": "0", "PASSWORD_HASH_MAX_PENDING": "100000"},
+    "pool (depois)": {"PASSWORD_HASH_WORKERS": "2", "PASSWORD_HASH_MAX_PENDING": "8"},
+}
+
+
+def prepare_database(path: Path) -> str:
+    url = f"sqlite:///{path}"
+    code = "from sqlalchemy import create_engine; from app.db.base import Base; import app.models; " f"Base.metadata.create_all(create_engine({url!r}))"
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return url
+
+
+async def wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(200):
+        try:
+            if (await client.get("/healthz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise RuntimeError("uvicorn não respondeu")
+
+
+async def storm(base_url: str, logins: int, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await wait_ready(client)
+        prof = await client.post("/api/auth/login", json={"email": "profissional@luxe.com", "password": "ProfLuxe2026"})
+        prof.raise_for_status()
+        cookies = dict(prof.cookies)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses: list[int] = []
+
+        async def one_login():
+            async with semaphore:
+                res = await client.post("/api/auth/login", json={"email": "admin@luxe.com", "password": "AdminLuxe2026"})
+                statuses.append(res.status_code)
+
+        latencies: list[float] = []
+        done = asyncio.Event()
+
+        async def poll():
+            async with httpx.AsyncClient(base_url=base_url, timeout=60, cookies=cookies) as poller:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    (await poller.get("/api/appointments")).raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    await asyncio.sleep(0.01)
+
+        poller = asyncio.create_task(poll())
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await poller
+
+    latencies.sort()
+    return {
+        "logins/s": round(logins / elapsed, 1),
+        "login_200": statuses.count(200),
+        "login_429": statuses.count(429),
+        "login_503": statuses.count(503),
+        "login_other": dict(Counter(code for code in statuses if code not in (200, 429, 503))),
+        "list_p50_ms": round(statistics.median(latencies), 1),
+        "list_p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1),
+        "list_samples": len(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for name, overrides in CONFIGS.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = os.environ | overrides | {
+                "DATABASE_URL": prepare_database(Path(tmp) / "bench.db"),
+                "UPLOAD_DIR": tmp,
+                "IDENTITY_CACHE_TTL_SECONDS": "0",
+                "AUTH_RATE_LIMIT_PER_MINUTE": str(10 * args.logins),
+            }
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+                env=env,
+            )
+            try:
+                result = asyncio.run(storm(f"http://127.0.0.1:{args.port}", args.logins, args.concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"{name:16} {result}")
+
+
+if __name__ == "__main__":
+    main()
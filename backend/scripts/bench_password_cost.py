@@ -0,0 +1,49 @@
+"""Tempo de hash/verify do bcrypt por custo, para escolher PASSWORD_HASH_ROUNDS na máquina de deploy.
+
+Uso (a partir de backend/): python -m scripts.bench_password_cost [--rounds 10-14] [--samples 5] [--budget-ms 250]
+"""
+import argparse
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+
+def measure(rounds: int, samples: int) -> tuple[float, float]:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash("benchmark123")
+    hash_times, verify_times = [], []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("benchmark123")
+        hash_times.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        context.verify("benchmark123", hashed)
+        verify_times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(hash_times), statistics.median(verify_times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", default="10-14", help="intervalo de custos, ex.: 10-14")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="orçamento de latência do verify no login")
+    args = parser.parse_args()
+
+    low, _, high = args.rounds.partition("-")
+    best = None
+    print(f"{'rounds':>6} {'hash ms':>9} {'verify ms':>10}")
+    for rounds in range(int(low), int(high or low) + 1):
+        hash_ms, verify_ms = measure(rounds, args.samples)
+        fits = verify_ms <= args.budget_ms
+        if fits:
+            best = rounds
+        print(f"{rounds:>6} {hash_ms:>9.1f} {verify_ms:>10.1f}{'' if fits else '  (acima do orçamento)'}")
+    if best is None:
+        print(f"Nenhum custo cabe em {args.budget_ms} ms")
+    else:
+        print(f"Maior custo dentro de {args.budget_ms} ms: PASSWORD_HASH_ROUNDS={best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Memória e hits/s do RateLimiter com muitas chaves distintas (ex.: IPs de um scan).
+
+Compara com a implementação anterior (deque de datetimes por chave, dict sem limite).
+Uso (a partir de backend/): python -m scripts.bench_rate_limiter [--keys 1000000]
+"""
+import argparse
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from app.core.rate_limiter import RateLimiter
+
+
+class LegacyRateLimiter:
+    def __init__(self, max_requests: int, window_seconds: int) -> None:
+        self.max_requests = max_requests
+        self.window = timedelta(seconds=window_seconds)
+        self.requests: dict[str, deque[datetime]] = {}
+
+    def hit(self, key: str) -> None:
+        now = datetime.utcnow()
+        queue = self.requests.setdefault(key, deque())
+        while queue and (now - queue[0]) > self.window:
+            queue.popleft()
+        if len(queue) >= self.max_requests:
+            raise RuntimeError("Rate limit exceeded")
+        queue.append(now)
+
+
+def run(name: str, factory, keys: list[str]) -> None:
+    # Vazão e memória em passadas separadas: o tracemalloc distorce o tempo.
+    limiter = factory()
+    started = time.perf_counter()
+    for key in keys:
+        limiter.hit(key)
+    elapsed = time.perf_counter() - started
+
+    limiter = factory()
+    tracemalloc.start()
+    for key in keys:
+        limiter.hit(key)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:8} {len(keys) / elapsed:>12,.0f} hits/s   retido {current / 2**20:>8.1f} MiB   pico {peak / 2**20:>8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    args = parser.parse_args()
+    keys = [f"login:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+    run("legado", lambda: LegacyRateLimiter(max_requests=10, window_seconds=60), keys)
+    run("atual", lambda: RateLimiter(max_requests=10, window_seconds=60), keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Importa atendimentos em massa (CSV ou JSON lines) para um profissional.
+
+Colunas/campos: serviceId, customerName, paymentMethod, price, transactionId, proofUrl, date (ISO, opcional).
+Uso (a partir de backend/): python -m scripts.import_appointments arquivo.csv --professional-email joao@luxe.com
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.db.appointment_import import IMPORT_CHUNK_SIZE, import_appointments
+from app.db.session import SessionLocal
+from app.models.profile import Profile
+from app.models.user import User
+
+MAX_PRINTED_ERRORS = 50
+
+
+def read_rows(path: Path) -> Iterator[dict | None]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        if path.suffix.lower() == ".csv":
+            # Campos vazios do CSV viram ausentes (transactionId/proofUrl/date opcionais).
+            for row in csv.DictReader(handle):
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+            return
+        for line in handle:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--professional-email", required=True)
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        found = (
+            db.query(User.id, Profile.shop_id)
+            .join(Profile, Profile.user_id == User.id)
+            .filter(User.email == args.professional_email, Profile.role == "professional")
+            .first()
+        )
+        if not found:
+            sys.exit(f"Profissional {args.professional_email} não encontrado")
+        started = time.perf_counter()
+        result = import_appointments(db, found[0], found[1], read_rows(args.path), chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"{result.created} atendimentos importados em {time.perf_counter() - started:.1f}s; {len(result.errors)} linhas com erro")
+    for error in result.errors[:MAX_PRINTED_ERRORS]:
+        print(f"  linha {error.row}: {error.message}", file=sys.stderr)
+    if result.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Backfill/repair of appointment_daily_rollups.
+
+Uso (a partir de backend/): python -m scripts.rebuild_rollups
+"""
+from app.db.rollups import rebuild_daily_rollups
+from app.db.session import SessionLocal
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_rollups(db)
+    finally:
+        db.close()
+    print(f"appointment_daily_rollups: {rows} linhas recalculadas")
+
+
+if __name__ == "__main__":
+    main()
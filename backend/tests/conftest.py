@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.db.base import Base
+from app.api.deps import get_async_db, get_db
+from app.db.session import async_database_url
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.identity_cache import identity_cache
+from app.core import query_profiler
+from app.api import auth, uploads
+from app.core.audit import audit_writer
+from app.core.service_catalog import service_catalog
+from app.core.upload_pipeline import upload_pipeline
+
+
+@pytest.fixture
+def session_factory(tmp_path_factory):
+    """File-backed SQLite, so background threads and the async engine see the same data."""
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    query_profiler.install_query_profiler(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    # N+1 nos testes falha a requisição em vez de só gerar log.
+    monkeypatch.setattr(settings, "sql_repeat_action", "raise")
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # NullPool: o TestClient abre um event loop por requisição e conexões aiosqlite não trocam de loop.
+    async_engine = create_async_engine(async_database_url(str(session_factory.kw["bind"].url)), poolclass=NullPool)
+    query_profiler.install_query_profiler(async_engine.sync_engine)
+    async_session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    identity_cache.clear()
+    auth.rate_limiter.reset()
+    uploads.rate_limiter.reset()
+    upload_pipeline.backlog.clear()
+    audit_writer.clear()
+    service_catalog.invalidate()
+    registry.clear()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_db, None)
+    identity_cache.clear()
+
+
+@pytest.fixture
+def register_manager(client):
+    """``register_manager("prefixo")`` registers a manager with a new shop; returns the response (cookies, user, shop)."""
+
+    def register(prefix: str = "gerente"):
+        res = client.post(
+            "/api/auth/register",
+            json={
+                "role": "manager",
+                "managerName": "Gerente Teste",
+                "shopName": f"Luxe {prefix}",
+                "phone": "11999999999",
+                "emailPrefix": prefix,
+                "password": "abc12345",
+                "confirmPassword": "abc12345",
+            },
+        )
+        assert res.status_code == 201
+        return res
+
+    return register
+
+
+@pytest.fixture
+def capture_statements():
+    """``with capture_statements() as captured:`` records ``(statement, parameters)`` run on any engine in the block.
+
+    Listens on the ``Engine`` class, so it covers the sync engine, the async engine of the
+    read endpoints and work done outside a request (audit flush, upload pipeline).
+    """
+
+    @contextmanager
+    def capture():
+        captured: list[tuple[str, object]] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield captured
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+    return capture
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def query_budget():
+    """``with query_budget(n): client.get(...)`` fails the test if any request in the block runs more than n statements."""
+
+    @contextmanager
+    def budget(limit: int):
+        over: list[str] = []
+
+        def check(scope, queries):
+            if queries.count > limit:
+                shapes = "\n  ".join(f"{repeats}x {shape}" for shape, repeats in queries.shapes.items())
+                over.append(f"{queries.method} {queries.path}: {queries.count} queries (orçamento {limit})\n  {shapes}")
+
+        query_profiler.listeners.append(check)
+        try:
+            yield
+        finally:
+            query_profiler.listeners.remove(check)
+        if over:
+            pytest.fail("\n".join(over))
+
+    return budget
@@ -0,0 +1,356 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from app.core.audit import audit_writer
+from app.core.identity_cache import identity_cache
+from app.db.duplicates import similar_names
+from app.db.rollups import rebuild_daily_rollups
+from app.models.appointment import Appointment
+from app.models.appointment_daily_rollup import AppointmentDailyRollup
+from app.models.audit_log import AuditLog
+from app.models.profile import Profile
+from app.models.service import Service
+from app.models.user import User
+
+
+def seed_history(db, shop_id: int, count: int):
+    service = Service(name="Corte", type="corte", price=5000, commission_rate=40, active=True)
+    professional = User(email="historico@luxe.com", first_name="Historico")
+    db.add_all([service, professional])
+    db.flush()
+    db.add(Profile(user_id=professional.id, shop_id=shop_id, role="professional", approval_status="active"))
+    base = datetime(2026, 1, 1, 9, 0)
+    # Datas repetidas de propósito: o cursor precisa desempatar pelo id.
+    db.add_all(
+        Appointment(
+            professional_id=professional.id,
+            service_id=service.id,
+            date=base + timedelta(hours=i // 3),
+            customer_name=f"Cliente {i}",
+            price=5000,
+            commission_rate=40,
+            payment_method="cash",
+            status="pending",
+        )
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_list_appointments_keyset_pagination(client, session_factory, register_manager):
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 60)
+    finally:
+        db.close()
+
+    # Sem limit, a resposta JSON é a página padrão, não a tabela inteira.
+    default = client.get("/api/appointments", cookies=manager.cookies)
+    assert default.status_code == 200
+    assert len(default.json()) == 50
+    assert "X-Next-Cursor" in default.headers
+    stream = client.get("/api/appointments", params={"format": "ndjson"}, cookies=manager.cookies)
+    expected_ids = [json.loads(line)["id"] for line in stream.text.splitlines()]
+    assert len(expected_ids) == 60
+    assert [item["id"] for item in default.json()] == expected_ids[:50]
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 25} | ({"cursor": cursor} if cursor else {})
+        page = client.get("/api/appointments", params=params, cookies=manager.cookies)
+        assert page.status_code == 200
+        pages.append([item["id"] for item in page.json()])
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [len(p) for p in pages] == [25, 25, 10]
+    assert sum(pages, []) == expected_ids
+
+    invalid = client.get("/api/appointments", params={"cursor": "nao-e-um-cursor"}, cookies=manager.cookies)
+    assert invalid.status_code == 400
+
+
+def test_list_appointments_ndjson_stream(client, session_factory, register_manager):
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 12)
+    finally:
+        db.close()
+
+    response = client.get("/api/appointments", params={"format": "ndjson"}, cookies=manager.cookies)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [item["id"] for item in client.get("/api/appointments", cookies=manager.cookies).json()]
+
+
+def query_plan(engine, statement: str, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_hot_queries_use_composite_indexes(client, session_factory, register_manager, capture_statements):
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 30)
+        professional_id = db.query(User.id).filter(User.email == "historico@luxe.com").scalar()
+    finally:
+        db.close()
+
+    engine = session_factory.kw["bind"]
+    with capture_statements() as captured:
+        cases = [
+            ({"professionalId": professional_id, "startDate": "2026-01-01", "endDate": "2026-01-02"}, {"ix_appointments_professional_id_date"}),
+            ({"limit": 10}, {"ix_appointments_date_id"}),
+            # Com status parametrizado o SQLite não casa o índice parcial; o Postgres escolhe entre os dois.
+            ({"status": "pending", "limit": 10}, {"ix_appointments_pending_date", "ix_appointments_status_date"}),
+        ]
+        for params, index_names in cases:
+            captured.clear()
+            assert client.get("/api/appointments", params=params, cookies=manager.cookies).status_code == 200
+            statement, parameters = next(item for item in captured if "FROM appointments" in item[0])
+            plan = query_plan(engine, statement, parameters)
+            assert any(name in plan for name in index_names), plan
+            assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+        captured.clear()
+        assert client.get("/api/stats", params={"startDate": "2026-01-01"}, cookies=manager.cookies).status_code == 200
+        rollup_queries = [item for item in captured if "FROM appointment_daily_rollups" in item[0]]
+        assert rollup_queries
+        for statement, parameters in rollup_queries:
+            assert "ix_appointment_daily_rollups_shop_id_day" in query_plan(engine, statement, parameters)
+
+
+def test_similar_names():
+    assert similar_names("João da Silva", "joao  da silva")
+    assert similar_names("Marcos", "Marcos Pereira")
+    assert similar_names("Fernanda", "Fernada")
+    assert not similar_names("Bruno", "Carla")
+
+
+def test_create_appointment_flags_near_duplicates_through_bucket_index(client, session_factory, register_manager, capture_statements):
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 3)
+        service_id = db.query(Service.id).scalar()
+        db.query(Profile).filter(Profile.role == "manager").update({"role": "professional", "approval_status": "active"})
+        professional_id = db.query(User.id).filter(User.email == "gerente@luxe.com").scalar()
+        # Mesma venda fora da janela: não conta.
+        db.add(
+            Appointment(
+                professional_id=professional_id, service_id=service_id, date=datetime.utcnow() - timedelta(minutes=30),
+                customer_name="Paulo Souza", price=4000, commission_rate=40, payment_method="cash", status="pending",
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+    identity_cache.clear()
+
+    def create(customer: str, price: int = 4000):
+        res = client.post(
+            "/api/appointments",
+            json={"serviceId": service_id, "customerName": customer, "paymentMethod": "cash", "price": price},
+            cookies=manager.cookies,
+        )
+        assert res.status_code == 201
+        return res.json()["possibleDuplicate"]
+
+    engine = session_factory.kw["bind"]
+    with capture_statements() as captured:
+        assert create("Paulo Souza") is False
+        statement, parameters = next(item for item in captured if "time_bucket IN" in item[0])
+        assert "ix_appointments_duplicate_bucket" in query_plan(engine, statement, parameters)
+    assert create("paulo souza") is True
+    assert create("Paulo Souza", price=4500) is False
+    assert create("Renata Lima") is False
+
+
+def test_batch_create_reports_row_errors_and_inserts_in_chunks(client, session_factory, register_manager, capture_statements):
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 1)
+        db.query(Appointment).update({"transaction_id": "tx-existente"})
+        service_id = db.query(Service.id).scalar()
+        db.query(Profile).filter(Profile.role == "manager").update({"role": "professional", "approval_status": "active"})
+        db.commit()
+    finally:
+        db.close()
+    identity_cache.clear()
+
+    rows = [
+        {"serviceId": service_id, "customerName": f"Cliente {i}", "paymentMethod": "card", "price": 5000, "transactionId": f"tx-{i}", "proofUrl": f"/uploads/{i}.jpg", "date": "2025-03-01T10:00:00-03:00"}
+        for i in range(1000)
+    ]
+    rows[3]["paymentMethod"] = "cheque"
+    rows[10]["serviceId"] = 999
+    rows[20]["transactionId"] = "tx-5"
+    rows[30]["transactionId"] = "tx-existente"
+    rows[40].pop("proofUrl")
+    rows[999]["customerName"] = "x"
+
+    with capture_statements() as captured:
+        res = client.post("/api/appointments/batch", json=rows, cookies=manager.cookies)
+    inserts = [statement for statement, _ in captured if statement.startswith("INSERT INTO appointments")]
+    assert res.status_code == 200
+    body = res.json()
+    assert body["created"] == 994
+    assert [(error["row"], error["message"]) for error in body["errors"]] == [
+        (4, body["errors"][0]["message"]),
+        (11, "Service not found"),
+        (21, "Transação já registrada"),
+        (31, "Transação já registrada"),
+        (41, "Comprovante obrigatório para pagamentos digitais"),
+        (1000, body["errors"][5]["message"]),
+    ]
+    assert "paymentMethod" in body["errors"][0]["message"]
+    assert len(inserts) <= 2  # um executemany por lote de IMPORT_CHUNK_SIZE linhas
+    assert len([statement for statement, _ in captured if "FROM services" in statement]) == 1
+
+    db = session_factory()
+    try:
+        imported = db.query(Appointment).filter(Appointment.transaction_id == "tx-0").one()
+        assert imported.date == datetime(2025, 3, 1, 13, 0)
+        assert imported.commission_rate == 40 and imported.time_bucket is not None
+        pending = db.query(func.sum(AppointmentDailyRollup.pending_count)).filter(AppointmentDailyRollup.day == date(2025, 3, 1)).scalar()
+        assert pending == 994
+    finally:
+        db.close()
+
+    too_many = client.post("/api/appointments/batch", json=[{}] * 5001, cookies=manager.cookies)
+    assert too_many.status_code == 413
+
+
+def test_bulk_review_uses_one_update_per_status_and_writes_audit_log(client, session_factory, register_manager, capture_statements):
+    manager = register_manager()
+    register_manager("outraloja")
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 300)
+        ids = [row[0] for row in db.query(Appointment.id).order_by(Appointment.id)]
+        foreign = Appointment(
+            professional_id=db.query(User.id).filter(User.email == "outraloja@luxe.com").scalar(), service_id=1,
+            customer_name="Outra", price=1000, commission_rate=40, payment_method="cash", status="pending",
+        )
+        db.add(foreign)
+        db.commit()
+        foreign_id = foreign.id
+        rebuild_daily_rollups(db)
+    finally:
+        db.close()
+
+    items = [{"id": i, "status": "confirmed"} for i in ids[:200]]
+    items += [{"id": i, "status": "rejected", "reason": "comprovante ilegível"} for i in ids[200:299]]
+    items += [{"id": ids[299], "status": "pending"}, {"id": foreign_id, "status": "confirmed"}, {"id": 999_999, "status": "confirmed"}]
+
+    engine = session_factory.kw["bind"]
+    with capture_statements() as captured:
+        res = client.post("/api/appointments/review", json={"items": items}, cookies=manager.cookies)
+    writes = [statement for statement, _ in captured if not statement.startswith("SELECT")]
+    assert res.status_code == 200
+    body = res.json()
+    assert body["notFound"] == sorted([foreign_id, 999_999])
+    statuses = [row["status"] for row in body["appointments"]]
+    assert statuses == ["confirmed"] * 200 + ["rejected"] * 99 + ["pending"]
+    assert len([statement for statement in writes if statement.startswith("UPDATE appointments")]) == 2
+    # O audit log não é gravado na requisição: sai em lote pelo audit_writer.
+    assert not [statement for statement in writes if statement.startswith("INSERT INTO audit_logs")]
+    assert audit_writer.flush(engine) == 299
+    assert len([statement for statement, _ in captured if "FROM appointments" in statement]) == 2
+
+    db = session_factory()
+    try:
+        assert db.query(AuditLog).count() == 299
+        rejected = db.query(AuditLog).filter(AuditLog.appointment_id == ids[250]).one()
+        assert json.loads(rejected.metadata_json) == {"from": "pending", "to": "rejected", "reason": "comprovante ilegível"}
+        assert db.get(Appointment, foreign_id).status == "pending"
+        rollup = (
+            db.query(func.sum(AppointmentDailyRollup.confirmed_revenue), func.sum(AppointmentDailyRollup.pending_count))
+            .filter(AppointmentDailyRollup.shop_id == manager.json()["shop"]["id"])
+            .one()
+        )
+        assert rollup == (200 * 5000, 1)
+    finally:
+        db.close()
+
+
+def test_concurrent_status_changes_apply_the_rollup_delta_once(client, session_factory, register_manager):
+    from app.api.appointments import review_appointments, update_status
+    from app.schemas.appointment import AppointmentBulkReview, AppointmentStatusUpdate
+
+    manager = register_manager()
+    db = session_factory()
+    try:
+        seed_history(db, manager.json()["shop"]["id"], 3)
+        ids = [row[0] for row in db.query(Appointment.id).order_by(Appointment.id)]
+        rebuild_daily_rollups(db)
+    finally:
+        db.close()
+
+    def rollup():
+        db = session_factory()
+        try:
+            return tuple(db.query(func.sum(AppointmentDailyRollup.confirmed_revenue), func.sum(AppointmentDailyRollup.pending_count)).one())
+        finally:
+            db.close()
+
+    def stale_session():
+        # Lê (e guarda no identity map) o status atual; a próxima mudança via API deixa essa leitura velha.
+        db = session_factory()
+        user = db.query(User).filter(User.email == "gerente@luxe.com").one()
+        profile = db.query(Profile).filter(Profile.user_id == user.id).one()
+        # O identity map guarda referências fracas: os objetos precisam continuar vivos.
+        db.info["loaded"] = db.query(Appointment).all()
+        return db, user, profile
+
+    def confirm(appointment_id):
+        res = client.patch(f"/api/appointments/{appointment_id}/status", json={"status": "confirmed"}, cookies=manager.cookies)
+        assert res.status_code == 200
+
+    # Duplo clique: a segunda confirmação leu "pending", mas não aplica o delta de novo.
+    db, user, profile = stale_session()
+    try:
+        confirm(ids[0])
+        assert update_status(ids[0], AppointmentStatusUpdate(status="confirmed"), db=db, user=user, profile=profile).status == "confirmed"
+    finally:
+        db.close()
+    assert rollup() == (5000, 2)
+
+    # Revisão em lote: só as linhas que o UPDATE realmente mudou entram no rollup.
+    db, user, profile = stale_session()
+    try:
+        confirm(ids[1])
+        review = AppointmentBulkReview(items=[{"id": ids[1], "status": "rejected"}, {"id": ids[2], "status": "confirmed"}])
+        result = review_appointments(review, db=db, user=user, profile=profile)
+        assert [appointment.status for appointment in result.appointments] == ["confirmed", "confirmed"]
+    finally:
+        db.close()
+    assert rollup() == (15000, 0)
+
+    # Outro gerente levou o atendimento para outro status: 409, sem delta.
+    db, user, profile = stale_session()
+    try:
+        assert client.patch(f"/api/appointments/{ids[0]}/status", json={"status": "rejected"}, cookies=manager.cookies).status_code == 200
+        with pytest.raises(HTTPException) as conflict:
+            update_status(ids[0], AppointmentStatusUpdate(status="pending"), db=db, user=user, profile=profile)
+        assert conflict.value.status_code == 409
+    finally:
+        db.close()
+    assert rollup() == (10000, 0)
+
+    db = session_factory()
+    try:
+        rebuild_daily_rollups(db)
+    finally:
+        db.close()
+    assert rollup() == (10000, 0)
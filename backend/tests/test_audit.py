@@ -0,0 +1,147 @@
+import time
+
+from sqlalchemy import create_engine
+
+from app.core.audit import AuditWriter, audit_writer
+from app.models.audit_log import AuditLog
+from app.models.professional_approval import ProfessionalApproval
+from app.models.user import User
+
+
+def test_audit_writer_flushes_by_size_and_interval_and_drains_on_stop(session_factory):
+    engine = session_factory.kw["bind"]
+    db = session_factory()
+    try:
+        actor = User(email="ator@luxe.com", first_name="Ator")
+        db.add(actor)
+        db.commit()
+        actor_id = actor.id
+    finally:
+        db.close()
+
+    def count() -> int:
+        db = session_factory()
+        try:
+            return db.query(AuditLog).count()
+        finally:
+            db.close()
+
+    def wait_for(expected: int) -> int:
+        deadline = time.time() + 5
+        while count() < expected and time.time() < deadline:
+            time.sleep(0.01)
+        return count()
+
+    writer = AuditWriter(batch_size=50, flush_interval=60, max_pending=1000)
+    writer.start(engine)
+    started = time.perf_counter()
+    for i in range(50):
+        writer.record(actor_id, "teste", metadata={"i": i})
+    # Registrar é só um append: nada de banco no caminho da requisição.
+    assert time.perf_counter() - started < 0.05
+    assert wait_for(50) == 50  # lote cheio sai sem esperar o intervalo
+    for i in range(10):
+        writer.record(actor_id, "teste", metadata={"i": i})
+    time.sleep(0.1)
+    assert count() == 50 and len(writer) == 10
+    writer.stop()
+    assert count() == 60 and len(writer) == 0
+
+    writer = AuditWriter(batch_size=1000, flush_interval=0.05, max_pending=1000)
+    writer.start(engine)
+    writer.record(actor_id, "intervalo")
+    assert wait_for(61) == 61
+    writer.stop()
+
+
+def test_audit_writer_retries_connection_errors_and_drops_bad_rows(session_factory, tmp_path):
+    writer = AuditWriter(batch_size=10, flush_interval=60, max_pending=3)
+    for i in range(5):
+        writer.record("ator-inexistente", "teste", metadata={"i": i})
+    assert len(writer) == 3 and writer.dropped == 2
+
+    # Banco inacessível: o lote volta para a fila até max_retries falhas seguidas.
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'ausente' / 'audit.db'}")
+    writer = AuditWriter(batch_size=10, flush_interval=60, max_pending=100, max_retries=2)
+    writer.record("ator", "teste")
+    assert writer.flush(unreachable) == 0 and writer.flush(unreachable) == 0
+    assert len(writer) == 1 and writer.dropped == 0
+    assert writer.flush(unreachable) == 0
+    assert len(writer) == 0 and writer.dropped == 1
+
+    engine = session_factory.kw["bind"]
+    db = session_factory()
+    try:
+        actor = User(email="atorfk@luxe.com", first_name="Ator")
+        db.add(actor)
+        db.commit()
+        actor_id = actor.id
+    finally:
+        db.close()
+
+    writer = AuditWriter(batch_size=10, flush_interval=60, max_pending=100)
+    writer.record(actor_id, "antes")
+    writer.record("ator-inexistente", "invalida")
+    writer.record(actor_id, "depois")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("PRAGMA foreign_keys = ON")
+    try:
+        # actor_id inexistente viola a FK: só essa linha é descartada, as demais são gravadas.
+        assert writer.flush(engine) == 2
+        assert len(writer) == 0 and writer.dropped == 1
+    finally:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA foreign_keys = OFF")
+    db = session_factory()
+    try:
+        assert {row.action for row in db.query(AuditLog).filter(AuditLog.actor_id == actor_id)} == {"antes", "depois"}
+    finally:
+        db.close()
+
+
+def test_audit_api_lists_shop_entries_with_keyset_pagination(client, session_factory, register_manager):
+    manager = register_manager("gerenteaudit")
+    cookies = manager.cookies
+    engine = session_factory.kw["bind"]
+
+    service = client.post(
+        "/api/services",
+        json={"name": "Barba", "type": "barba", "price": 3000, "commissionRate": 40, "active": True},
+        cookies=cookies,
+    ).json()
+    client.patch(f"/api/services/{service['id']}", json={"price": 3500}, cookies=cookies)
+    client.post(
+        "/api/auth/register",
+        json={
+            "role": "professional",
+            "name": "Barbeiro Audit",
+            "phone": "11988887777",
+            "emailPrefix": "barbeiroaudit",
+            "password": "abc12345",
+            "confirmPassword": "abc12345",
+            "shopCode": manager.json()["shop"]["code"],
+        },
+    )
+    professional_id = client.get("/api/professionals/pending", cookies=cookies).json()[0]["userId"]
+    client.post(f"/api/professionals/{professional_id}/decision", json={"action": "approve"}, cookies=cookies)
+    client.delete(f"/api/services/{service['id']}", cookies=cookies)
+
+    assert client.get("/api/audit", cookies=cookies).json() == []
+    assert audit_writer.flush(engine) == 5
+
+    first = client.get("/api/audit", params={"limit": 2}, cookies=cookies)
+    assert [entry["action"] for entry in first.json()] == ["service.delete", "professional.approve"]
+    second = client.get("/api/audit", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, cookies=cookies)
+    assert [entry["action"] for entry in second.json()] == ["service.update", "service.create"]
+    assert "X-Next-Cursor" not in second.headers
+    assert second.json()[0]["metadata"] == {"serviceId": service["id"], "price": 3500}
+
+    filtered = client.get("/api/audit", params={"action": "professional.approve"}, cookies=cookies).json()
+    assert filtered[0]["metadata"] == {"professionalUserId": professional_id}
+
+    db = session_factory()
+    try:
+        approval = db.query(ProfessionalApproval).one()
+        assert (approval.professional_user_id, approval.action) == (professional_id, "approve")
+    finally:
+        db.close()
@@ -1,11 +1,16 @@
+import asyncio
+
+import pytest
 from fastapi.testclient import TestClient
+from starlette.requests import Request
 from sqlalchemy import create_engine
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
 from app.db.base import Base
-from app.api.deps import get_db
+from app.api.deps import get_db, get_identity_async
+from app.core.identity_cache import IdentityCache, identity_cache
 
 
 def setup_test_db():
@@ -106,3 +111,138 @@ def test_login_email_is_case_insensitive():
     login = client.post("/api/auth/login", json={"email": "CaseUser@LUXE.com", "password": "abc12345"})
     assert login.status_code == 200
     assert login.json()["email"] == "caseuser@luxe.com"
+
+
+def test_identity_is_loaded_with_a_single_query(client, register_manager, capture_statements):
+    register = register_manager("gerentequery")
+
+    with capture_statements() as captured:
+        me = client.get("/api/me", cookies=register.cookies)
+        assert me.status_code == 200
+        assert me.json()["shop"]["code"] == register.json()["shop"]["code"]
+        assert len(captured) == 1, captured
+
+        identity_cache.clear()
+        captured.clear()
+        assert client.get("/api/appointments", cookies=register.cookies).status_code == 200
+        assert len(captured) == 2, captured
+
+        # Identidade em cache: só a consulta de negócio chega ao banco.
+        captured.clear()
+        assert client.get("/api/appointments", cookies=register.cookies).status_code == 200
+        assert len(captured) == 1, captured
+        captured.clear()
+        assert client.get("/api/me", cookies=register.cookies).json()["shop"]["code"] == register.json()["shop"]["code"]
+        assert captured == []
+
+
+def test_identity_cache_is_invalidated_on_profile_change(client, register_manager):
+    shop_code = register_manager("gerentecache").json()["shop"]["code"]
+    client.post(
+        "/api/auth/register",
+        json={
+            "role": "professional",
+            "name": "Barbeiro Cache",
+            "phone": "11988887777",
+            "emailPrefix": "barbeirocache",
+            "password": "abc12345",
+            "confirmPassword": "abc12345",
+            "shopCode": shop_code,
+        },
+    )
+    manager_login = client.post("/api/auth/login", json={"email": "gerentecache@luxe.com", "password": "abc12345"})
+    professional_id = client.get("/api/professionals/pending", cookies=manager_login.cookies).json()[0]["userId"]
+    client.post(f"/api/professionals/{professional_id}/decision", json={"action": "approve"}, cookies=manager_login.cookies)
+    login = client.post("/api/auth/login", json={"email": "barbeirocache@luxe.com", "password": "abc12345"})
+
+    assert client.get("/api/me", cookies=login.cookies).json()["profile"]["availability"] is True
+    update = client.patch("/api/professional/availability", json={"availability": False}, cookies=login.cookies)
+    assert update.status_code == 200
+    assert client.get("/api/me", cookies=login.cookies).json()["profile"]["availability"] is False
+
+
+def test_async_identity_from_cache_is_a_private_copy(client, register_manager):
+    register = register_manager("gerentecopia")
+    assert client.get("/api/me", cookies=register.cookies).status_code == 200
+    token = register.cookies["access_token"]
+    snapshot = identity_cache.get(token)
+
+    def request():
+        return Request({"type": "http", "headers": [(b"cookie", f"access_token={token}".encode())]})
+
+    user, profile, shop = asyncio.run(get_identity_async(request(), db=None))
+    assert user is not snapshot[0] and profile is not snapshot[1] and shop is not snapshot[2]
+    user.first_name = "Alterado"
+    again, _profile, _shop = asyncio.run(get_identity_async(request(), db=None))
+    assert again.first_name == snapshot[0].first_name == "Gerente"
+
+
+def test_identity_cache_is_bounded_and_expires(monkeypatch):
+    cache = IdentityCache(max_entries=2, ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr("app.core.identity_cache.time.monotonic", lambda: now[0])
+    cache.set("a", "user-a", ("A",))
+    cache.set("b", "user-b", ("B",))
+    assert cache.get("a") == ("A",)
+    cache.set("c", "user-c", ("C",))
+    assert cache.get("b") is None
+    cache.invalidate_user("user-a")
+    assert cache.get("a") is None
+    now[0] += 11
+    assert cache.get("c") is None
+
+
+def test_login_rehashes_password_with_current_cost(client, session_factory, monkeypatch):
+    from passlib.context import CryptContext
+
+    from app.core import security
+    from app.core.password_hashing import password_hasher
+    from app.models.user import User
+
+    db = session_factory()
+    try:
+        legacy_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("abc12345")
+        db.add(User(email="legado@luxe.com", first_name="Legado", hashed_password=legacy_hash))
+        db.commit()
+    finally:
+        db.close()
+
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    monkeypatch.setattr(password_hasher, "workers", 0)
+
+    login = client.post("/api/auth/login", json={"email": "legado@luxe.com", "password": "abc12345"})
+    assert login.status_code == 200
+
+    db = session_factory()
+    try:
+        new_hash = db.query(User.hashed_password).filter(User.email == "legado@luxe.com").scalar()
+    finally:
+        db.close()
+    assert new_hash != legacy_hash
+    assert new_hash.startswith("$2b$05$")
+    assert client.post("/api/auth/login", json={"email": "legado@luxe.com", "password": "abc12345"}).status_code == 200
+
+
+def test_password_hasher_times_out_with_503_and_counts_failures(monkeypatch):
+    from concurrent.futures import Future
+
+    from fastapi import HTTPException
+
+    from app.core.password_hashing import PasswordHasher
+
+    hasher = PasswordHasher(workers=1, max_pending=2, timeout_seconds=0.01)
+
+    class StuckExecutor:
+        def submit(self, fn, *args):
+            return Future()
+
+    monkeypatch.setattr(hasher, "_get_executor", lambda: StuckExecutor())
+    with pytest.raises(HTTPException) as timed_out:
+        hasher.hash("abc12345")
+    assert timed_out.value.status_code == 503
+    assert timed_out.value.headers["Retry-After"] == "1"
+
+    monkeypatch.setattr(hasher, "workers", 0)
+    assert hasher.verify("abc12345", hasher.hash("abc12345")) is True
+    stats = hasher.metrics()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (2, 1, 0)
@@ -0,0 +1,59 @@
+import threading
+
+from app.core.metrics import Counter, Histogram
+
+
+def test_per_thread_counters_are_exact_under_concurrency():
+    counter = Counter("test_total", "Teste.", ("kind",))
+    histogram = Histogram("test_seconds", "Teste.", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(10_000):
+            counter.inc("a")
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.totals() == {("a",): 80_000}
+    samples = list(histogram.samples())
+    assert 'test_seconds_bucket{le="0.1"} 0' in samples
+    assert 'test_seconds_bucket{le="1"} 80000' in samples
+    assert 'test_seconds_bucket{le="+Inf"} 80000' in samples
+    assert "test_seconds_count 80000" in samples
+
+
+def test_metrics_endpoint_exposes_routes_pools_limiters_and_uploads(client, register_manager, upload_dir):
+    register = register_manager("gerentemetricas")
+    assert client.get("/api/appointments", cookies=register.cookies).status_code == 200
+    assert client.patch("/api/appointments/999/status", json={"status": "confirmed"}, cookies=register.cookies).status_code == 404
+    for _ in range(11):
+        client.post("/api/auth/login", json={"email": "ninguem@luxe.com", "password": "errada123"})
+    content = b"x" * 1234
+    presigned = client.post(
+        "/api/uploads/request-url",
+        json={"name": "foto.jpg", "size": len(content), "contentType": "image/jpeg"},
+        cookies=register.cookies,
+    ).json()
+    assert client.put(presigned["uploadURL"], content=content, cookies=register.cookies).status_code == 200
+
+    response = client.get("/internal/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/appointments",status="2xx"} 1' in body
+    # Template da rota, não o id do atendimento.
+    assert 'http_request_duration_seconds_count{method="PATCH",route="/api/appointments/{appointment_id}/status",status="4xx"} 1' in body
+    assert 'rate_limiter_rejections_total{limiter="auth"} 1' in body
+    assert 'upload_bytes_total{kind="direct"} 1234' in body
+    assert 'db_pool_checked_out{pool="sync"}' in body
+    assert "http_requests_in_flight 1" in body
+    # O cadastro do gerente passou pelo pool de bcrypt.
+    assert "password_hash_in_flight 0" in body
+    completed = next(line for line in body.splitlines() if line.startswith('password_hash_operations_total{result="completed"}'))
+    assert int(completed.split()[-1]) >= 1
+    assert 'password_hash_operations_total{result="failed"}' in body
+    assert "password_hash_busy_seconds_total " in body
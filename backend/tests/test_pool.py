@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.db import pool as pool_module
+from app.db.pool import install_pool_listeners, pool_options, pool_stats, pool_status
+
+
+@pytest.fixture
+def file_url(tmp_path):
+    yield f"sqlite:///{tmp_path / 'pool.db'}"
+    for name in ("test-timeout", "test-idle"):
+        pool_stats.pop(name, None)
+
+
+def test_pool_status_reports_wait_histogram_and_timeouts(file_url, monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 0)
+    monkeypatch.setattr(settings, "db_pool_timeout_seconds", 0.05)
+    monkeypatch.setattr(settings, "db_pool_pre_ping", "never")
+    engine = create_engine(file_url, **pool_options(file_url, "test-timeout"))
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    status = pool_status("test-timeout", engine.pool)
+    assert status["size"] == 1
+    assert status["checkedOut"] == 1
+    assert status["overflow"] == 0
+    assert status["timeouts"] == 1
+    assert status["waitMs"]["count"] == 1
+    assert status["waitMs"]["buckets"]["+Inf"] == 1
+
+    held.close()
+    engine.dispose()
+    # dispose() recria o pool com a mesma classe: as métricas continuam.
+    with engine.connect():
+        pass
+    assert pool_status("test-timeout", engine.pool)["waitMs"]["count"] == 2
+    engine.dispose()
+
+
+def test_idle_pre_ping_skips_recently_used_connections(file_url, monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_pre_ping", "idle")
+    monkeypatch.setattr(settings, "db_pool_pre_ping_idle_seconds", 10)
+    now = [1000.0]
+    monkeypatch.setattr(pool_module.time, "monotonic", lambda: now[0])
+    engine = create_engine(file_url, **pool_options(file_url, "test-idle"))
+    install_pool_listeners(engine, "test-idle")
+
+    pings = []
+    real_ping = engine.dialect.do_ping
+    monkeypatch.setattr(engine.dialect, "do_ping", lambda dbapi_connection: pings.append(1) or real_ping(dbapi_connection))
+
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert pings == []
+
+    now[0] += 11
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert len(pings) == 1
+
+    # Ping falhou: a conexão ociosa é descartada e o checkout recebe uma nova.
+    def broken_ping(dbapi_connection):
+        raise RuntimeError("server closed the connection")
+
+    monkeypatch.setattr(engine.dialect, "do_ping", broken_ping)
+    now[0] += 11
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    assert pool_status("test-idle", engine.pool)["invalidated"] == 1
+    engine.dispose()
+
+
+def test_in_memory_sqlite_keeps_its_default_pool():
+    assert pool_options("sqlite+pysqlite:///:memory:", "test-memory") == {"pool_pre_ping": settings.db_pool_pre_ping == "always"}
+    assert "test-memory" not in pool_stats
+
+
+def test_internal_pool_endpoint_requires_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "internal_token", "segredo")
+    assert client.get("/internal/pool").status_code == 403
+    assert client.get("/internal/pool", headers={"X-Internal-Token": "errado"}).status_code == 403
+    response = client.get("/internal/pool", headers={"X-Internal-Token": "segredo"})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["pools"]) == {"sync", "async"}
+    assert body["maxConnectionsPerProcess"] == 2 * (settings.db_pool_size + settings.db_max_overflow)
+
+    monkeypatch.setattr(settings, "internal_token", None)
+    monkeypatch.setattr(settings, "env", "production")
+    assert client.get("/internal/pool").status_code == 404
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+
+from app.core.config import settings
+from app.core.identity_cache import identity_cache
+from app.core.query_profiler import RepeatedQueryError, RequestQueries, statement_shape
+
+
+def test_server_timing_counts_sync_and_async_requests(client, register_manager, monkeypatch):
+    register = register_manager("gerentetiming")
+    identity_cache.clear()
+
+    # /api/appointments roda no event loop (AsyncSession); o cadastro de serviço, no threadpool.
+    listing = client.get("/api/appointments", cookies=register.cookies)
+    assert listing.headers["Server-Timing"].startswith("db;dur=")
+    assert listing.headers["Server-Timing"].endswith('desc="2 queries"')
+    created = client.post(
+        "/api/services",
+        json={"name": "Barba", "type": "barba", "price": 3000, "commissionRate": 40},
+        cookies=register.cookies,
+    )
+    assert created.status_code == 201
+    assert 'desc="0 queries"' not in created.headers["Server-Timing"]
+
+    monkeypatch.setattr(settings, "env", "production")
+    assert "Server-Timing" not in client.get("/api/appointments", cookies=register.cookies).headers
+
+
+def test_repeated_statement_shapes_are_logged_or_raised(monkeypatch, caplog):
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT *\n FROM t WHERE id IN (?)")
+
+    monkeypatch.setattr(settings, "sql_repeat_threshold", 2)
+    monkeypatch.setattr(settings, "sql_repeat_action", "log")
+    queries = RequestQueries("GET", "/api/stats")
+    with caplog.at_level(logging.WARNING, logger="app.core.query_profiler"):
+        for _ in range(4):
+            queries.record_statement("SELECT users.first_name FROM users WHERE users.id = ?")
+    assert queries.count == 4
+    assert len(caplog.records) == 1
+    assert "GET /api/stats" in caplog.text
+
+    monkeypatch.setattr(settings, "sql_repeat_action", "raise")
+    queries = RequestQueries("GET", "/api/stats")
+    queries.record_statement("SELECT 1")
+    queries.record_statement("SELECT 1")
+    with pytest.raises(RepeatedQueryError):
+        queries.record_statement("SELECT 1")
+
+
+def test_query_budget_fails_requests_over_budget(client, register_manager, query_budget):
+    register = register_manager("gerentebudget")
+
+    with query_budget(2):
+        assert client.get("/api/appointments", cookies=register.cookies).status_code == 200
+    # Identidade em cache: só a listagem.
+    with query_budget(1):
+        assert client.get("/api/appointments", cookies=register.cookies).status_code == 200
+
+    identity_cache.clear()
+    with pytest.raises(pytest.fail.Exception, match=r"GET /api/appointments: 2 queries \(orçamento 1\)"):
+        with query_budget(1):
+            client.get("/api/appointments", cookies=register.cookies)
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.rate_limiter import DatabaseRateLimitStore, RateLimiter
+from app.models.rate_limit_counter import RateLimitCounter
+
+
+def test_limit_is_enforced_within_window():
+    limiter = RateLimiter(max_requests=3, window_seconds=60)
+    assert [limiter.allow("ip", now=10.0) for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("other", now=10.0)
+    assert limiter.rejections == 1
+
+
+def test_hit_raises_429():
+    limiter = RateLimiter(max_requests=1, window_seconds=60)
+    limiter.hit("ip")
+    with pytest.raises(HTTPException) as exc:
+        limiter.hit("ip")
+    assert exc.value.status_code == 429
+
+
+def test_previous_window_is_weighted_while_sliding():
+    limiter = RateLimiter(max_requests=4, window_seconds=60)
+    for _ in range(4):
+        assert limiter.allow("ip", now=50.0)
+    # 15s no novo ciclo: 4 * 0.75 = 3 hits estimados, sobra 1
+    assert limiter.allow("ip", now=75.0)
+    assert not limiter.allow("ip", now=75.0)
+    # Dois ciclos depois a chave está livre de novo
+    assert limiter.allow("ip", now=185.0)
+
+
+def test_idle_keys_are_swept_and_key_count_is_capped():
+    limiter = RateLimiter(max_requests=5, window_seconds=10, max_keys=100)
+    for i in range(1000):
+        limiter.allow(f"ip-{i}", now=1.0)
+    assert len(limiter) == 100
+    limiter.allow("late", now=25.0)
+    assert len(limiter) == 1
+
+
+def test_database_store_is_shared_between_workers(session_factory):
+    engine = session_factory.kw["bind"]
+    # Dois limiters com stores próprios simulam dois workers apontando para o mesmo banco.
+    worker_a = RateLimiter(max_requests=5, window_seconds=60, store=DatabaseRateLimitStore(engine))
+    worker_b = RateLimiter(max_requests=5, window_seconds=60, store=DatabaseRateLimitStore(engine))
+    results = [(worker_a if i % 2 else worker_b).allow("login:1.2.3.4", now=600.0) for i in range(8)]
+    assert results == [True] * 5 + [False] * 3
+    assert worker_a.allow("login:5.6.7.8", now=600.0)
+
+    # Janela seguinte: só os 5 hits aceitos contam; 5 * 0.5 de sobreposição = 2.5, sobram 3
+    assert [(worker_a if i % 2 else worker_b).allow("login:1.2.3.4", now=690.0) for i in range(4)] == [True] * 3 + [False]
+    assert len(worker_a) == 2
+
+    # Janelas antigas são apagadas
+    worker_a.allow("login:9.9.9.9", now=900.0)
+    with engine.connect() as conn:
+        windows = {row.window for row in conn.execute(RateLimitCounter.__table__.select())}
+    assert windows == {15}
+
+
+@pytest.mark.parametrize("backend", ["memory", "database"])
+def test_memory_and_database_stores_follow_the_same_rule(backend, session_factory):
+    store = DatabaseRateLimitStore(session_factory.kw["bind"]) if backend == "database" else None
+    limiter = RateLimiter(max_requests=3, window_seconds=60, store=store)
+    # Recusas não contam: martelar a chave não estende o bloqueio para a janela seguinte.
+    assert [limiter.allow("ip", now=30.0) for _ in range(6)] == [True] * 3 + [False] * 3
+    assert [limiter.allow("ip", now=90.0) for _ in range(3)] == [True, True, False]
+    assert limiter.rejections == 4
+    assert len(limiter) == 1
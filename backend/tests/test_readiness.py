@@ -0,0 +1,72 @@
+import asyncio
+
+from sqlalchemy import create_engine
+
+from app.core.cloudinary import CloudinaryClient
+from app.core.config import settings
+from app.core.readiness import ReadinessProbe, readiness_probe
+
+
+def test_readyz_serves_cached_checks_without_touching_the_database(client, session_factory, upload_dir, monkeypatch):
+    monkeypatch.setattr(readiness_probe, "checks", None)
+    monkeypatch.setattr(readiness_probe, "checked_at", None)
+    starting = client.get("/readyz")
+    assert starting.status_code == 503
+    assert starting.json() == {"status": "starting"}
+
+    asyncio.run(readiness_probe.refresh(session_factory.kw["bind"]))
+    for _ in range(5):
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert response.headers["Server-Timing"].endswith('desc="0 queries"')
+    body = response.json()
+    assert body["status"] == "ok"
+    assert set(body["checks"]) == {"database", "uploads"}
+    assert list(upload_dir.iterdir()) == []
+
+    broken = create_engine(f"sqlite:///{upload_dir / 'missing' / 'db.sqlite'}")
+    asyncio.run(readiness_probe.refresh(broken))
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"]["ok"] is False
+    assert client.get("/healthz").status_code == 200
+
+
+def test_readiness_fails_on_unwritable_upload_dir_and_stale_results(session_factory, tmp_path, monkeypatch):
+    probe = ReadinessProbe(interval=5, timeout=1)
+    not_a_directory = tmp_path / "arquivo"
+    not_a_directory.write_text("x")
+    monkeypatch.setattr(settings, "upload_dir", str(not_a_directory))
+    checks = asyncio.run(probe.refresh(session_factory.kw["bind"]))
+    assert checks["database"]["ok"] is True
+    assert checks["uploads"]["ok"] is False
+    assert probe.status()[0] is False
+
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    asyncio.run(probe.refresh(session_factory.kw["bind"]))
+    assert probe.status()[0] is True
+    probe.checked_at -= 16
+    ready, body = probe.status()
+    assert ready is False
+    assert body["status"] == "stale"
+
+
+def test_unreachable_cloudinary_is_reported_but_optional(session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "cloudinary_cloud_name", "demo")
+    probe = ReadinessProbe(interval=5, timeout=1)
+
+    async def refresh():
+        probe.cloudinary = CloudinaryClient("http://127.0.0.1:9", timeout=1, max_connections=1, max_retries=0, backoff_seconds=0)
+        try:
+            return await probe.refresh(session_factory.kw["bind"])
+        finally:
+            await probe.cloudinary.aclose()
+
+    checks = asyncio.run(refresh())
+    assert checks["cloudinary"]["ok"] is False
+    assert probe.status()[0] is True
+
+    monkeypatch.setattr(settings, "readiness_require_cloudinary", True)
+    asyncio.run(refresh())
+    assert probe.status()[0] is False
@@ -0,0 +1,76 @@
+from app.core.identity_cache import identity_cache
+from app.models.profile import Profile
+from app.models.service import Service
+
+
+def test_service_catalog_is_cached_with_etag_and_invalidated_on_write(client, session_factory, register_manager, capture_statements):
+    cookies = register_manager("gerentecatalogo").cookies
+    created = client.post(
+        "/api/services",
+        json={"name": "Corte", "type": "corte", "price": 5000, "commissionRate": 40, "active": True},
+        cookies=cookies,
+    ).json()
+
+    first = client.get("/api/services", cookies=cookies)
+    assert first.status_code == 200
+    assert first.json() == [created]
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    with capture_statements() as captured:
+        cached = client.get("/api/services", cookies=cookies)
+        not_modified = client.get("/api/services", headers={"If-None-Match": etag}, cookies=cookies)
+    statements = [statement for statement, _ in captured if "FROM services" in statement]
+    assert cached.content == first.content
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert statements == []
+
+    client.patch(f"/api/services/{created['id']}", json={"price": 5500}, cookies=cookies)
+    changed = client.get("/api/services", headers={"If-None-Match": etag}, cookies=cookies)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0]["price"] == 5500
+
+    assert client.delete(f"/api/services/{created['id']}", cookies=cookies).status_code == 204
+    assert client.get("/api/services", cookies=cookies).json() == []
+
+
+def test_create_appointment_reads_commission_from_database(client, session_factory, register_manager, capture_statements):
+    cookies = register_manager("gerentecatalogo").cookies
+    service = client.post(
+        "/api/services",
+        json={"name": "Barba", "type": "barba", "price": 3000, "commissionRate": 35, "active": True},
+        cookies=cookies,
+    ).json()
+    db = session_factory()
+    try:
+        db.query(Profile).update({"role": "professional", "approval_status": "active"})
+        client.get("/api/services", cookies=cookies)
+        # Outro worker alterou a comissão: este processo ainda tem o catálogo antigo em cache.
+        db.query(Service).filter(Service.id == service["id"]).update({"commission_rate": 45})
+        db.commit()
+    finally:
+        db.close()
+    identity_cache.clear()
+
+    with capture_statements() as captured:
+        res = client.post(
+            "/api/appointments",
+            json={"serviceId": service["id"], "customerName": "Cliente", "paymentMethod": "cash", "price": 3000},
+            cookies=cookies,
+        )
+        missing = [
+            client.post(
+                "/api/appointments",
+                json={"serviceId": service_id, "customerName": "Cliente", "paymentMethod": "cash", "price": 3000},
+                cookies=cookies,
+            )
+            for service_id in (999, 1000, 1001)
+        ]
+    statements = [statement for statement, _ in captured if "FROM services" in statement]
+    assert res.status_code == 201 and res.json()["commissionRate"] == 45
+    assert [response.status_code for response in missing] == [404, 404, 404]
+    # Uma busca por chave primária por requisição; ids desconhecidos não recarregam o catálogo.
+    assert len(statements) == 4
+    assert not any("ORDER BY services.id" in statement for statement in statements)
+    assert client.get("/api/services", cookies=cookies).json()[0]["commissionRate"] == 35
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.db.rollups import rebuild_daily_rollups
+from app.models.appointment import Appointment
+from app.models.appointment_daily_rollup import AppointmentDailyRollup
+from app.models.profile import Profile
+from app.models.service import Service
+from app.models.user import User
+
+
+def reference_stats(db):
+    """Implementação original em Python, usada como oráculo para as agregações SQL."""
+    appointments = db.query(Appointment).order_by(Appointment.id).all()
+    professionals = {}
+    for appt in appointments:
+        user = db.query(User).filter(User.id == appt.professional_id).first()
+        prof = professionals.setdefault(
+            appt.professional_id,
+            {"id": appt.professional_id, "name": user.first_name or "Profissional", "totalCuts": 0, "totalRevenue": 0, "grossCommission": 0},
+        )
+        prof["totalCuts"] += 1
+        if appt.status == "confirmed":
+            prof["totalRevenue"] += appt.price
+            prof["grossCommission"] += int(appt.price * appt.commission_rate / 100)
+
+    today = datetime.utcnow().date()
+    daily_map = defaultdict(int)
+    for appt in appointments:
+        if appt.status == "confirmed":
+            daily_map[appt.date.date()] += appt.price
+    return {
+        "totalCuts": len(appointments),
+        "totalRevenue": sum(a.price for a in appointments if a.status == "confirmed"),
+        "totalCommission": sum(int(a.price * a.commission_rate / 100) for a in appointments if a.status == "confirmed"),
+        "pendingApprovals": sum(1 for a in appointments if a.status == "pending"),
+        "professionals": list(professionals.values()),
+        "revenueByDay": [
+            {"day": (today - timedelta(days=i)).strftime("%d/%m"), "total": daily_map.get(today - timedelta(days=i), 0)}
+            for i in range(6, -1, -1)
+        ],
+    }
+
+
+def seed_appointments(db, shop_id: int, count: int = 120, now: datetime | None = None):
+    service = Service(name="Corte", type="corte", price=5000, commission_rate=40, active=True)
+    professionals = [User(email=f"pro{shop_id}-{i}@luxe.com", first_name=None if i == 2 else f"Pro {i}") for i in range(3)]
+    db.add(service)
+    db.add_all(professionals)
+    db.flush()
+    db.add_all(Profile(user_id=user.id, shop_id=shop_id, role="professional", approval_status="active") for user in professionals)
+    now = now or datetime.utcnow()
+    statuses = ["confirmed", "pending", "rejected", "confirmed"]
+    for i in range(count):
+        db.add(
+            Appointment(
+                professional_id=professionals[i % 3].id,
+                service_id=service.id,
+                date=now - timedelta(days=i % 11, hours=i % 5),
+                customer_name=f"Cliente {i}",
+                price=1999 + i * 37,
+                commission_rate=[33, 40, 45][i % 3],
+                payment_method="cash",
+                status=statuses[i % 4],
+            )
+        )
+    db.commit()
+
+
+def test_stats_matches_reference_implementation(client, session_factory, query_budget, register_manager):
+    register = register_manager("gerentestats")
+
+    db = session_factory()
+    try:
+        seed_appointments(db, register.json()["shop"]["id"])
+        rebuild_daily_rollups(db)
+        expected = reference_stats(db)
+    finally:
+        db.close()
+
+    # Identidade, totais por profissional e série diária: não cresce com o número de profissionais.
+    with query_budget(3):
+        response = client.get("/api/stats", cookies=register.cookies)
+    assert response.status_code == 200
+    data = response.json()
+
+    for key in ("totalCuts", "totalRevenue", "totalCommission", "pendingApprovals", "revenueByDay"):
+        assert data[key] == expected[key]
+    assert data["netPayable"] == expected["totalCommission"]
+    assert sorted(
+        ({k: prof[k] for k in ("id", "name", "totalCuts", "totalRevenue", "grossCommission")} for prof in data["professionals"]),
+        key=lambda prof: prof["id"],
+    ) == sorted(expected["professionals"], key=lambda prof: prof["id"])
+
+
+def test_stats_window_is_scoped_to_manager_shop(client, session_factory, register_manager):
+    shop_a = register_manager("gerentea")
+    shop_b = register_manager("gerenteb")
+    now = datetime(2026, 3, 20, 12, 0)
+
+    db = session_factory()
+    try:
+        seed_appointments(db, shop_a.json()["shop"]["id"], count=40, now=now)
+        seed_appointments(db, shop_b.json()["shop"]["id"], count=10, now=now)
+        rebuild_daily_rollups(db)
+        in_window = [
+            a for a in db.query(Appointment).join(Profile, Profile.user_id == Appointment.professional_id)
+            .filter(Profile.shop_id == shop_a.json()["shop"]["id"]).all()
+            if datetime(2026, 3, 16) <= a.date < datetime(2026, 3, 21)
+        ]
+    finally:
+        db.close()
+
+    response = client.get(
+        "/api/stats",
+        params={"startDate": "2026-03-16", "endDate": "2026-03-20", "granularity": "day"},
+        cookies=shop_a.cookies,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totalCuts"] == len(in_window)
+    assert data["totalRevenue"] == sum(a.price for a in in_window if a.status == "confirmed")
+    assert [bucket["day"] for bucket in data["revenueByDay"]] == ["16/03", "17/03", "18/03", "19/03", "20/03"]
+    assert sum(bucket["total"] for bucket in data["revenueByDay"]) == data["totalRevenue"]
+
+    weekly = client.get(
+        "/api/stats",
+        params={"startDate": "2026-03-01", "endDate": "2026-03-20", "granularity": "week"},
+        cookies=shop_b.cookies,
+    ).json()
+    assert weekly["totalCuts"] == 10
+    assert [bucket["day"] for bucket in weekly["revenueByDay"]] == ["23/02", "02/03", "09/03", "16/03"]
+    assert sum(bucket["total"] for bucket in weekly["revenueByDay"]) == weekly["totalRevenue"]
+
+    invalid = client.get("/api/stats", params={"startDate": "2026-03-20", "endDate": "2026-03-01"}, cookies=shop_a.cookies)
+    assert invalid.status_code == 400
+
+
+def rollup_snapshot(db):
+    return sorted(
+        (row.professional_id, row.day, row.cuts, row.confirmed_revenue, row.gross_commission, row.pending_count)
+        for row in db.query(AppointmentDailyRollup).all()
+    )
+
+
+def test_rollup_is_updated_incrementally_by_appointment_endpoints(client, session_factory, register_manager):
+    manager = register_manager("gerenterollup")
+    professional = client.post(
+        "/api/auth/register",
+        json={
+            "role": "professional",
+            "name": "Barbeiro Rollup",
+            "phone": "11988887777",
+            "emailPrefix": "barbeirorollup",
+            "password": "abc12345",
+            "confirmPassword": "abc12345",
+            "shopCode": manager.json()["shop"]["code"],
+        },
+    )
+    professional_id = professional.json()["user"]["id"]
+    client.post(f"/api/professionals/{professional_id}/decision", json={"action": "approve"}, cookies=manager.cookies)
+    login = client.post("/api/auth/login", json={"email": "barbeirorollup@luxe.com", "password": "abc12345"})
+    assert login.status_code == 200
+
+    service = client.post(
+        "/api/services",
+        json={"name": "Corte", "type": "corte", "price": 5000, "commissionRate": 45},
+        cookies=manager.cookies,
+    ).json()
+    created = [
+        client.post(
+            "/api/appointments",
+            json={"serviceId": service["id"], "customerName": f"Cliente {i}", "paymentMethod": "cash", "price": 4999 + i},
+            cookies=login.cookies,
+        )
+        for i in range(3)
+    ]
+    assert all(res.status_code == 201 for res in created)
+    for res, status in zip(created, ["confirmed", "rejected", "confirmed"]):
+        update = client.patch(f"/api/appointments/{res.json()['id']}/status", json={"status": status}, cookies=manager.cookies)
+        assert update.status_code == 200
+    client.patch(f"/api/appointments/{created[2].json()['id']}/status", json={"status": "pending"}, cookies=manager.cookies)
+
+    db = session_factory()
+    try:
+        incremental = rollup_snapshot(db)
+        rebuild_daily_rollups(db)
+        assert incremental == rollup_snapshot(db)
+        assert incremental[0][2:] == (3, 4999, 4999 * 45 // 100, 1)
+    finally:
+        db.close()
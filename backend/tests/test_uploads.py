@@ -0,0 +1,410 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core.cloudinary import CloudinaryClient, decode_data_url
+from app.core.config import settings
+from app.core.identity_cache import identity_cache
+from app.core.receipt_fingerprint import difference_hash
+from app.core.upload_pipeline import UploadJob, UploadPipeline, recover_pending_uploads, upload_pipeline
+from app.models.appointment import Appointment
+from app.models.media_upload import MediaUpload
+from app.models.profile import Profile
+from app.models.service import Service
+from app.models.user import User
+
+
+def test_upload_is_streamed_hashed_and_renamed(client, register_manager, upload_dir):
+    cookies = register_manager("gerenteupload").cookies
+    content = bytes(range(256)) * 4000
+    presigned = client.post(
+        "/api/uploads/request-url",
+        json={"name": "../comprovante.jpg", "size": len(content), "contentType": "image/jpeg"},
+        cookies=cookies,
+    ).json()
+
+    res = client.put(presigned["uploadURL"], content=content, cookies=cookies)
+    assert res.status_code == 200
+    assert res.json()["sha256"] == hashlib.sha256(content).hexdigest()
+
+    stored = upload_dir / presigned["objectPath"].split("/", 1)[1]
+    assert stored.read_bytes() == content
+    assert [p.name for p in stored.parent.iterdir()] == ["comprovante.jpg"]
+
+
+def test_upload_rejects_body_larger_than_declared_and_tampered_urls(client, register_manager, upload_dir):
+    cookies = register_manager("gerenteupload").cookies
+    presigned = client.post(
+        "/api/uploads/request-url",
+        json={"name": "recibo.png", "size": 10, "contentType": "image/png"},
+        cookies=cookies,
+    ).json()
+
+    too_big = client.put(presigned["uploadURL"], content=b"x" * 11, cookies=cookies)
+    assert too_big.status_code == 413
+    assert not any(upload_dir.rglob("*"))
+
+    tampered = presigned["uploadURL"].replace("size=10", "size=1000")
+    assert client.put(tampered, content=b"x" * 11, cookies=cookies).status_code == 403
+
+    def chunks():
+        for _ in range(3):
+            yield b"y" * 5
+
+    streamed = client.put(presigned["uploadURL"], content=chunks(), cookies=cookies)
+    assert streamed.status_code == 413
+    assert not any(p.is_file() for p in upload_dir.rglob("*"))
+
+
+class MockCloudinary(ThreadingHTTPServer):
+    """Cloudinary local: conta conexões TCP e pode falhar as primeiras requisições com 503."""
+
+    def __init__(self, fail_first: int = 0):
+        self.connections = 0
+        self.requests: list[str] = []
+        self.fail_first = fail_first
+        super().__init__(("127.0.0.1", 0), MockCloudinaryHandler)
+
+
+class MockCloudinaryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append(self.headers["Content-Type"])
+        if len(self.server.requests) <= self.server.fail_first:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        asset = hashlib.sha256(body).hexdigest()[:12]
+        payload = json.dumps({"secure_url": f"https://res.example/{asset}.jpg", "public_id": asset, "asset_id": asset}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_cloudinary(monkeypatch):
+    monkeypatch.setattr(settings, "cloudinary_cloud_name", "demo")
+    monkeypatch.setattr(settings, "cloudinary_api_key", "key")
+    monkeypatch.setattr(settings, "cloudinary_api_secret", "secret")
+
+    def start(fail_first: int = 0):
+        server = MockCloudinary(fail_first)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, CloudinaryClient(
+            base_url=f"http://127.0.0.1:{server.server_port}",
+            timeout=5,
+            max_connections=4,
+            max_retries=2,
+            backoff_seconds=0.01,
+        )
+
+    servers: list[MockCloudinary] = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cloudinary_client_reuses_connections_and_sends_multipart(mock_cloudinary):
+    server, cloudinary = mock_cloudinary()
+    image = b"\xff\xd8\xff" + bytes(range(256)) * 100
+
+    async def run():
+        latencies = []
+        try:
+            for _ in range(20):
+                started = time.perf_counter()
+                result = await cloudinary.upload(image, "image/jpeg", "salons/1/payments")
+                latencies.append(time.perf_counter() - started)
+        finally:
+            await cloudinary.aclose()
+        return result, latencies
+
+    result, latencies = asyncio.run(run())
+    assert result["secure_url"] == f"https://res.example/{result['public_id']}.jpg"
+    assert server.connections == 1
+    assert all(content_type.startswith("multipart/form-data") for content_type in server.requests)
+    assert statistics.median(latencies) < 0.5
+
+
+def test_cloudinary_client_retries_5xx_with_backoff(mock_cloudinary):
+    server, cloudinary = mock_cloudinary(fail_first=2)
+
+    async def run():
+        try:
+            return await cloudinary.upload(b"abc", "image/png", "salons/1/payments")
+        finally:
+            await cloudinary.aclose()
+
+    assert asyncio.run(run())["secure_url"].startswith("https://res.example/")
+    assert len(server.requests) == 3
+
+    server, cloudinary = mock_cloudinary(fail_first=5)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+    assert exc.value.status_code == 502
+    assert len(server.requests) == 3
+
+
+def test_decode_data_url():
+    data, content_type = decode_data_url("data:image/png;base64," + base64.b64encode(b"png-bytes").decode())
+    assert (data, content_type) == (b"png-bytes", "image/png")
+    with pytest.raises(HTTPException):
+        decode_data_url("data:image/png;base64,@@@")
+
+
+def test_receipt_upload_returns_immediately_and_is_pushed_by_pipeline(client, register_manager, session_factory, upload_dir, mock_cloudinary, monkeypatch):
+    server, cloudinary = mock_cloudinary()
+    monkeypatch.setattr(upload_pipeline, "cloudinary", cloudinary)
+    cookies = register_manager("gerenteupload").cookies
+    image = b"\x89PNG" + bytes(range(200))
+
+    res = client.post(
+        "/api/uploads",
+        json={"type": "receipt", "dataBase64": "data:image/png;base64," + base64.b64encode(image).decode()},
+        cookies=cookies,
+    )
+    assert res.status_code == 202
+    job = res.json()
+    assert job["status"] == "pending"
+    assert server.requests == []
+    local_url = job["secure_url"]
+    assert (upload_dir / local_url.removeprefix("/uploads/")).read_bytes() == image
+    assert client.get(f"/api/uploads/jobs/{job['jobId']}", cookies=cookies).json()["status"] == "pending"
+
+    db = session_factory()
+    try:
+        service = Service(name="Corte", type="corte", price=5000, commission_rate=40)
+        db.add(service)
+        db.flush()
+        user_id = db.query(User.id).filter(User.email == "gerenteupload@luxe.com").scalar()
+        appointment = Appointment(
+            professional_id=user_id, service_id=service.id, customer_name="Cliente", price=5000,
+            commission_rate=40, payment_method="pix", transaction_id="tx-1", proof_url=local_url,
+            proof_hash=hashlib.sha256(image).hexdigest(), status="pending",
+        )
+        db.add(appointment)
+        db.commit()
+        appointment_id = appointment.id
+    finally:
+        db.close()
+
+    async def run():
+        try:
+            await upload_pipeline.run_backlog()
+        finally:
+            await cloudinary.aclose()
+
+    asyncio.run(run())
+    status = client.get(f"/api/uploads/jobs/{job['jobId']}", cookies=cookies).json()
+    assert status["status"] == "done"
+    assert status["secure_url"].startswith("https://res.example/")
+    assert len(server.requests) == 1
+
+    db = session_factory()
+    try:
+        assert db.get(Appointment, appointment_id).proof_url == status["secure_url"]
+    finally:
+        db.close()
+
+
+def test_upload_pipeline_workers_drain_on_stop(session_factory, upload_dir, mock_cloudinary):
+    server, cloudinary = mock_cloudinary(fail_first=1)
+    pipeline = UploadPipeline(workers=2, queue_size=10)
+    pipeline.cloudinary = cloudinary
+    engine = session_factory.kw["bind"]
+
+    db = session_factory()
+    try:
+        jobs = []
+        for i in range(4):
+            path = upload_dir / f"r{i}.jpg"
+            path.write_bytes(b"jpg" * (i + 1))
+            media = MediaUpload(type="receipt", status="pending", local_path=str(path), content_type="image/jpeg")
+            db.add(media)
+            db.flush()
+            jobs.append(UploadJob(media.id, str(path), f"/uploads/r{i}.jpg", "image/jpeg", "salons/1/payments", engine))
+        db.commit()
+    finally:
+        db.close()
+
+    async def run():
+        await pipeline.start()
+        assert all(pipeline.submit(job) for job in jobs)
+        pipeline.submit(jobs[0])  # duplicado: a reivindicação da linha evita um segundo envio
+        await pipeline.stop()
+        await cloudinary.aclose()
+
+    asyncio.run(run())
+    db = session_factory()
+    try:
+        assert sorted(media.status for media in db.query(MediaUpload).all()) == ["done"] * 4
+    finally:
+        db.close()
+    assert len(server.requests) == 5
+
+
+def test_retrying_a_receipt_whose_job_failed_requeues_it(client, register_manager, session_factory, upload_dir, monkeypatch):
+    cookies = register_manager("gerenteupload").cookies
+    payload = {"type": "receipt", "dataBase64": "data:image/png;base64," + base64.b64encode(b"\x89PNG fila cheia").decode()}
+
+    monkeypatch.setattr(upload_pipeline, "submit", lambda job: False)
+    full = client.post("/api/uploads", json=payload, cookies=cookies)
+    assert full.status_code == 503
+    assert full.headers["Retry-After"] == "5"
+
+    submitted = []
+    monkeypatch.setattr(upload_pipeline, "submit", lambda job: submitted.append(job) or True)
+    retry = client.post("/api/uploads", json=payload, cookies=cookies)
+    assert retry.status_code == 202
+    assert retry.json()["status"] == "pending"
+    assert [job.media_id for job in submitted] == [retry.json()["jobId"]]
+    db = session_factory()
+    try:
+        assert db.query(MediaUpload).count() == 1
+    finally:
+        db.close()
+
+
+def test_receipt_upload_keeps_database_work_off_the_event_loop(client, register_manager, session_factory, upload_dir, monkeypatch):
+    cookies = register_manager("gerenteupload").cookies
+    payload = {"type": "receipt", "dataBase64": "data:image/png;base64," + base64.b64encode(b"\x89PNG fora do loop").decode()}
+    monkeypatch.setattr(upload_pipeline, "submit", lambda job: True)
+
+    def on_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    engine = session_factory.kw["bind"]
+    threads = []
+    listener = lambda *args: threads.append(on_event_loop())
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert client.post("/api/uploads", json=payload, cookies=cookies).status_code == 202
+        assert client.post("/api/uploads", json=payload, cookies=cookies).status_code == 202
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert threads and not any(threads)
+
+
+def test_recovery_resubmits_pending_and_stale_processing_rows(session_factory, upload_dir, monkeypatch):
+    now = datetime.utcnow()
+    db = session_factory()
+    try:
+        rows = {
+            "pending": MediaUpload(type="receipt", status="pending", local_path=str(upload_dir / "a.jpg")),
+            "stale": MediaUpload(type="receipt", status="processing", claimed_at=now - timedelta(hours=1), local_path=str(upload_dir / "b.jpg")),
+            "active": MediaUpload(type="receipt", status="processing", claimed_at=now, local_path=str(upload_dir / "c.jpg")),
+        }
+        db.add_all(rows.values())
+        db.commit()
+        ids = {name: media.id for name, media in rows.items()}
+    finally:
+        db.close()
+
+    submitted = []
+    monkeypatch.setattr(upload_pipeline, "submit", lambda job: submitted.append(job.media_id) or True)
+    assert recover_pending_uploads(session_factory.kw["bind"]) == 2
+    assert sorted(submitted) == sorted([ids["pending"], ids["stale"]])
+    db = session_factory()
+    try:
+        assert db.get(MediaUpload, ids["stale"]).status == "pending"
+        assert db.get(MediaUpload, ids["active"]).status == "processing"
+    finally:
+        db.close()
+
+
+def png_bytes(shade: int, compress_level: int) -> bytes:
+    image_module = pytest.importorskip("PIL.Image")
+    image = image_module.new("L", (64, 64))
+    image.putdata([(x * 4 + shade) % 256 for y in range(64) for x in range(64)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def test_difference_hash_bits():
+    assert difference_hash([[3, 2, 1] + [0] * 6] + [[0] * 9] * 7) == "e000000000000000"
+    assert len(difference_hash([[0] * 9] * 8)) == 16
+
+
+def test_duplicate_receipts_are_stored_once_and_flag_appointments(client, register_manager, session_factory, upload_dir):
+    cookies = register_manager("gerenteupload").cookies
+    db = session_factory()
+    try:
+        service = Service(name="Corte", type="corte", price=5000, commission_rate=40)
+        db.add(service)
+        db.query(Profile).update({"role": "professional", "approval_status": "active"})
+        db.commit()
+        service_id = service.id
+    finally:
+        db.close()
+    identity_cache.clear()
+
+    def upload(data: bytes):
+        return client.post(
+            "/api/uploads",
+            json={"type": "receipt", "dataBase64": "data:image/png;base64," + base64.b64encode(data).decode()},
+            cookies=cookies,
+        )
+
+    def create(proof_url: str, transaction_id: str, customer: str):
+        res = client.post(
+            "/api/appointments",
+            json={"serviceId": service_id, "customerName": customer, "paymentMethod": "pix", "price": 5000, "transactionId": transaction_id, "proofUrl": proof_url},
+            cookies=cookies,
+        )
+        assert res.status_code == 201
+        return res.json()
+
+    original = png_bytes(shade=0, compress_level=9)
+    first, again = upload(original), upload(original)
+    assert first.status_code == again.status_code == 202
+    assert first.json()["jobId"] == again.json()["jobId"]
+    assert first.json()["secure_url"] == again.json()["secure_url"]
+    assert [p.name for p in upload_dir.rglob("*") if p.is_file()] == [f"{hashlib.sha256(original).hexdigest()}.png"]
+    assert len(upload_pipeline.backlog) == 1
+
+    assert create(first.json()["secure_url"], "tx-1", "Bruno")["possibleDuplicate"] is False
+    assert create(again.json()["secure_url"], "tx-2", "Carla")["possibleDuplicate"] is True
+
+    # Mesma imagem recodificada: bytes diferentes, mesmo hash perceptual.
+    reencoded = upload(png_bytes(shade=0, compress_level=0))
+    assert reencoded.json()["jobId"] != first.json()["jobId"]
+    assert create(reencoded.json()["secure_url"], "tx-3", "Daniel")["possibleDuplicate"] is True
+
+    different = upload(png_bytes(shade=128, compress_level=9))
+    assert create(different.json()["secure_url"], "tx-4", "Elisa")["possibleDuplicate"] is False
+
+    db = session_factory()
+    try:
+        assert db.query(Appointment.proof_hash).filter(Appointment.transaction_id == "tx-1").scalar() == hashlib.sha256(original).hexdigest()
+    finally:
+        db.close()
@@ -0,0 +1,21 @@
+import { Button } from "@/components/ui/button";
+import { Loader2 } from "lucide-react";
+
+type LoadMoreProps = {
+  hasNextPage?: boolean;
+  isFetchingNextPage?: boolean;
+  fetchNextPage: () => unknown;
+};
+
+export function LoadMore({ hasNextPage, isFetchingNextPage, fetchNextPage }: LoadMoreProps) {
+  if (!hasNextPage) return null;
+
+  return (
+    <div className="mt-6 flex justify-center">
+      <Button variant="outline" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+        {isFetchingNextPage && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+        Carregar mais
+      </Button>
+    </div>
+  );
+}
@@ -1,20 +1,36 @@
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { api, buildUrl, type Appointment, type InsertAppointment } from "@shared/routes";
 import { z } from "zod";
 
+// A listagem JSON vem paginada (50 por página); a próxima página é indicada pelo header X-Next-Cursor.
 export function useAppointments(filters?: { startDate?: string; endDate?: string; professionalId?: string }) {
   const queryString = filters ? new URLSearchParams(filters as any).toString() : "";
   const queryKey = [api.appointments.list.path, queryString];
 
-  return useQuery({
+  const query = useInfiniteQuery({
     queryKey,
-    queryFn: async () => {
-      const url = `${api.appointments.list.path}?${queryString}`;
+    initialPageParam: null as string | null,
+    queryFn: async ({ pageParam }) => {
+      const params = new URLSearchParams(queryString);
+      if (pageParam) params.set("cursor", pageParam);
+      const url = `${api.appointments.list.path}?${params.toString()}`;
       const res = await fetch(url, { credentials: "include" });
       if (!res.ok) throw new Error("Failed to fetch appointments");
-      return api.appointments.list.responses[200].parse(await res.json());
+      return {
+        appointments: api.appointments.list.responses[200].parse(await res.json()),
+        nextCursor: res.headers.get("X-Next-Cursor"),
+      };
     },
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
   });
+
+  return {
+    data: query.data?.pages.flatMap((page) => page.appointments),
+    isLoading: query.isLoading,
+    hasNextPage: query.hasNextPage,
+    fetchNextPage: query.fetchNextPage,
+    isFetchingNextPage: query.isFetchingNextPage,
+  };
 }
 
 export function useCreateAppointment() {
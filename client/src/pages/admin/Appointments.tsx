@@ -2,6 +2,7 @@ import { AppShell } from "@/components/AppShell";
 import { useAppointments, useUpdateAppointmentStatus } from "@/hooks/use-appointments";
 import { useServices } from "@/hooks/use-services";
 import { StatusBadge } from "@/components/StatusBadge";
+import { LoadMore } from "@/components/LoadMore";
 import { Currency } from "@/components/Currency";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { Button } from "@/components/ui/button";
@@ -12,7 +13,7 @@ import { useToast } from "@/hooks/use-toast";
 import { Dialog, DialogContent, DialogTrigger } from "@/components/ui/dialog";
 
 export default function AdminAppointments() {
-  const { data: appointments, isLoading } = useAppointments();
+  const { data: appointments, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useAppointments();
   const { data: services } = useServices();
   
   if (isLoading) return <div className="min-h-screen flex items-center justify-center"><Loader2 className="animate-spin" /></div>;
@@ -67,6 +68,8 @@ export default function AdminAppointments() {
           </div>
         )}
       </div>
+
+      <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} fetchNextPage={fetchNextPage} />
     </AppShell>
   );
 }
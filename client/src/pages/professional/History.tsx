@@ -2,6 +2,7 @@ import { AppShell } from "@/components/AppShell";
 import { useAppointments } from "@/hooks/use-appointments";
 import { useServices } from "@/hooks/use-services";
 import { StatusBadge } from "@/components/StatusBadge";
+import { LoadMore } from "@/components/LoadMore";
 import { Currency } from "@/components/Currency";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { format } from "date-fns";
@@ -10,11 +11,11 @@ import { Loader2 } from "lucide-react";
 
 export default function ProfessionalHistory() {
   // Filter by current professional ID logic needs to be handled by backend usually based on auth user
-  // but we can pass explicit ID if needed. Here `useAppointments` without filters fetches all, 
+  // but we can pass explicit ID if needed. Here `useAppointments` without filters pages through all ("Carregar mais"), 
   // backend should filter for non-admins? 
   // Let's assume the List endpoint returns ALL for admin, and OWN for pro. 
   // The route implementation typically handles this policy.
-  const { data: appointments, isLoading } = useAppointments();
+  const { data: appointments, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useAppointments();
   const { data: services } = useServices();
 
   if (isLoading) return <div className="min-h-screen flex items-center justify-center"><Loader2 className="animate-spin" /></div>;
@@ -86,6 +87,8 @@ export default function ProfessionalHistory() {
           </div>
         )}
       </div>
+
+      <LoadMore hasNextPage={hasNextPage} isFetchingNextPage={isFetchingNextPage} fetchNextPage={fetchNextPage} />
     </AppShell>
   );
 }